@@ -1,11 +1,26 @@
+import os
+import re
+import hashlib
 import numpy as np
-import csv
+
+# folder of test case files, next to this script
+TEST_CASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Test case')
+# folder of parsed test case caches, one .npz per file content hash
+CACHE_DIR = os.path.join(TEST_CASE_DIR, '.cache')
+# version of parse_instances, part of the cache key, bump it on every change of the parsed result
+PARSER_VERSION = 2
+# first instance number of each Taillard size (n jobs, m machines): ta01~ta10 are 15x15, ta11~ta20 are 20x15...
+TAILLARD = {(15, 15): 1, (20, 15): 11, (20, 20): 21, (30, 15): 31,
+            (30, 20): 41, (50, 15): 51, (50, 20): 61, (100, 20): 71}
+# a line of exactly two integers: number of jobs and machines in OR-Library format
+SIZE_LINE = re.compile(r'^\s*\d+\s+\d+\s*$')
 
 
 # class for better processing test cases
 class TestCase:
     def __init__(self, name, size, pt, po, slv='To be solved', time='To be solved', obj='To be solved',
-                 sch='To be solved', dtl=False):
+                 sch='To be solved', dtl=False, ws_obj=None, ws_sch=None, ws_rule=None,
+                 opt=False, cfg=None, lb=None, bt=None, st=None, trj=None):
         """
         :param name: name of test case
         :param size: (n jobs * m machines)
@@ -16,6 +31,16 @@ class TestCase:
         :param obj: optimal objective in second
         :param sch: schedule solution (start time) in second
         :param dtl: detail flag when printing
+        :param ws_obj: objective of the warm start schedule, also the fallback if the solver finds no solution
+        :param ws_sch: warm start schedule (start time) in second
+        :param ws_rule: dispatching rule that built the warm start schedule
+        :param opt: True if the solver proved the objective optimal
+        :param cfg: solver configuration that produced the solution
+        :param lb: proven lower bound on the objective in second
+        :param bt: model build time of the solver in second
+        :param st: solve time of the solver in second
+        :param trj: trajectory of the solver as a list of (time in second, incumbent, best bound, node count),
+                    None for values the solver does not report
         """
         self.name = name
         self.size = size
@@ -26,6 +51,15 @@ class TestCase:
         self.obj = obj
         self.sch = sch
         self.dtl = dtl
+        self.ws_obj = ws_obj
+        self.ws_sch = ws_sch
+        self.ws_rule = ws_rule
+        self.opt = opt
+        self.cfg = cfg
+        self.lb = lb
+        self.bt = bt
+        self.st = st
+        self.trj = trj if trj is not None else []
 
     def __str__(self):
         info = f'Case name: {self.name}\n' \
@@ -33,9 +67,13 @@ class TestCase:
                f'Number of machines: {self.size[1]}\n' \
                f'Processing time:\n{self.pt}\n' \
                f'Processing order:\n{self.po}\n' \
+               f'Warm start: {self.ws_obj} ({self.ws_rule})\n' \
                f'Solver: {self.slv}\n' \
+               f'Configuration: {self.cfg}\n' \
                f'Time: {self.time}\n' \
                f'Optimal objective: {self.obj}\n' \
+               f'Proven optimal: {self.opt}\n' \
+               f'Lower bound: {self.lb}\n' \
                f'Schedule (start time):\n{self.sch}\n' \
             if self.dtl else \
             f'Case name: {self.name}\n' \
@@ -45,26 +83,169 @@ class TestCase:
             f'Schedule (start time):\n{self.sch}\n'
         return info
 
+    def time_to_within(self, pct, ref=None):
+        """
+        :param pct: type of float, tolerance in percent above the reference objective
+        :param ref: type of int, reference objective, e.g. best known value, None for the final objective
+        :return: type of float, first time in second the incumbent is within pct of ref, None if never
+        """
+
+        ref = self.obj if ref is None else ref
+        for t, inc, bnd, nodes in self.trj:
+            if inc is not None and inc <= ref * (1 + pct / 100):
+                return t
+        return None
+
+    def primal_integral(self, ref=None, t_end=None):
+        """
+        integral over time of the primal gap |inc - ref| / max(inc, ref), which is 1 before the first incumbent
+        :param ref: type of int, reference objective, e.g. best known value, None for the final objective
+        :param t_end: type of float, end of the integral in second, None for build time + solve time
+        :return: type of float, primal integral in second, None without trajectory
+        """
+
+        if not self.trj:
+            return None
+        ref = self.obj if ref is None else ref
+        t_end = self.bt + self.st if t_end is None else t_end
+
+        integral, t_prev, gap = 0., 0., 1.
+        for t, inc, bnd, nodes in self.trj:
+            t = min(t, t_end)
+            integral += gap * (t - t_prev)
+            t_prev = t
+            if inc is not None:
+                gap = abs(inc - ref) / max(abs(inc), abs(ref)) if max(abs(inc), abs(ref)) else 0.
+        return integral + gap * (t_end - t_prev)
+
+
+def _matrix(lines, rows):
+    """
+    :param lines: type of list, text lines of integers
+    :param rows: type of int, number of rows
+    :return: type of np.ndarray, integers parsed by numpy in a (rows, -1) array
+    """
+
+    return np.fromstring(' '.join(lines), dtype=np.int64, sep=' ').reshape(rows, -1)
+
+
+def parse_instances(lines, stem='case'):
+    """
+    streaming parser of job shop instances in OR-Library format (one or more instances per file, machines 0-indexed,
+    each row as machine-time pairs in processing order) or in Taillard format (Times and Machines blocks,
+    machines 1-indexed)
+    :param lines: type of iterable, text lines of a test case file
+    :param stem: type of str, file name without extension, used to name instances without a name
+    :return: generator of (name, pt, po), a Taillard instance is named after its number in the benchmark only in
+             a file of several instances, ta01~ta80 as in the original files, otherwise after stem
+    """
 
-def read_test_case(case_name):
-    # (temp) container for all test cases
-    cases_temp, cases = [], []
+    lines = iter(lines)
+    k = 0  # number of instances so far
+    held = None  # first Taillard instance, named once it is known whether the file holds more
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        first = False  # first instance of the file in Taillard format
 
-    # read all test cases into cases
+        # OR-Library: instance name, description, size, one row per job
+        if tokens[0] == 'instance' and len(tokens) == 2:
+            name = tokens[1]
+            line = next(lines)
+            while not SIZE_LINE.match(line):
+                line = next(lines)
+            n, m = map(int, line.split())
+            rows = []
+            while len(rows) < n:
+                line = next(lines)
+                if line.strip():
+                    rows.append(line)
+            a = _matrix(rows, n)
+            po, times = a[:, 0::2], a[:, 1::2]
+
+        # Taillard: header, size and seeds, Times block, Machines block
+        elif line.lstrip().startswith('Nb of jobs'):
+            n, m = map(int, next(lines).split()[:2])
+            first, blocks = not k, {}
+            for block in ('Times', 'Machines'):
+                line = next(lines)
+                while line.strip() != block:
+                    line = next(lines)
+                blocks[block] = _matrix([next(lines) for _ in range(n)], n)
+            po, times = blocks['Machines'] - 1, blocks['Times']
+            name = f'ta{TAILLARD[n, m] + k:02d}' if (n, m) in TAILLARD and k < 10 else f'{stem}_{k + 1}'
+
+        else:
+            continue
+
+        # pt is indexed by machine, po lists machines in processing order
+        pt = np.zeros((n, m), dtype=int)
+        pt[np.arange(n)[:, None], po] = times
+        k += 1
+        if held is not None:
+            yield held
+            held = None
+        if first:
+            held = name, pt, po.astype(int)
+            continue
+        yield name, pt, po.astype(int)
+
+    # a single Taillard instance in the file
+    if held is not None:
+        yield (stem, *held[1:])
+
+
+def read_instances(path, cache=True):
+    """
+    read all instances in a test case file, using a cache keyed by the hash of the file content
+    :param path: type of str, path of the test case file
+    :param cache: type of bool, True to load from and save to CACHE_DIR
+    :return: cases: type of list, Test_case objects
+    """
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    cache_path = os.path.join(CACHE_DIR, hashlib.sha1(f'{PARSER_VERSION}'.encode() + content).hexdigest() + '.npz')
+
+    if cache and os.path.exists(cache_path):
+        data = np.load(cache_path)
+        instances = [(str(name), data[f'pt_{k}'], data[f'po_{k}']) for k, name in enumerate(data['names'])]
+    else:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        instances = list(parse_instances(content.decode().splitlines(), stem))
+        if cache:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            arrays = {'names': np.array([name for name, pt, po in instances])}
+            for k, (name, pt, po) in enumerate(instances):
+                arrays[f'pt_{k}'], arrays[f'po_{k}'] = pt, po
+            np.savez_compressed(cache_path, **arrays)
+
+    return [TestCase(name, pt.shape, pt, po) for name, pt, po in instances]
+
+
+def read_test_case(case_name, folder=TEST_CASE_DIR, cache=True):
+    """
+    read test cases by file name, or by instance name from any file in folder
+    :param case_name: type of list, file names without .txt (all instances in the file) or instance names
+    :param folder: type of str, folder of test case files
+    :param cache: type of bool, True to use the parsed test case cache
+    :return: cases: type of list, Test_case objects
+    """
+
+    cases, index = [], None
     for each in case_name:
-        with open(f'.\Test case\{each}.txt', newline='') as f:
-            cases_temp.append(list(csv.reader(f)))
-
-    # process test cases format
-    for case in cases_temp:
-        name = case[2][0].split(' ')[-1]
-        size = tuple(map(int, case[6][0].split(' ')[1:]))
-        pt, po = np.zeros(size, dtype=int), np.zeros(size, dtype=int)
-        for i, each in enumerate(case[7:]):
-            single_job = list(filter(lambda a: a != '', each[0].split(' ')))
-            for j in range(0, len(single_job), 2):
-                po[i, int(j / 2)] = single_job[j]
-                pt[i, int(single_job[j])] = int(single_job[j + 1])
-        cases.append(TestCase(name, size, pt, po))
+        path = os.path.join(folder, f'{each}.txt')
+        if os.path.exists(path):
+            cases += read_instances(path, cache)
+            continue
+
+        # look up the instance name in all files of the folder
+        if index is None:
+            index = {case.name: case for file in sorted(os.listdir(folder)) if file.endswith('.txt')
+                     for case in read_instances(os.path.join(folder, file), cache)}
+        if each not in index:
+            raise FileNotFoundError(f'No test case file or instance named {each} in {folder}')
+        cases.append(index[each])
 
     return cases
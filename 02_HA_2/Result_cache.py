@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import inspect
+import functools
+import numpy as np
+
+# root of the repository, only its own modules are hashed into a solver version
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# folder of cached solver results, one .pkl per instance, solver and parameters, next to this script
+RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'results')
+# solution fields of Test_case restored on a cache hit
+FIELDS = ('slv', 'time', 'obj', 'sch', 'opt', 'lb', 'bt', 'st', 'trj', 'cfg', 'ws_obj', 'ws_sch', 'ws_rule')
+
+
+def _update(h, obj):
+    """
+    feed an object into a hash in a canonical form: arrays by dtype, shape and content, dicts by sorted keys
+    :param h: type of hashlib hash
+    :param obj: type of any, nested lists, tuples, dicts, arrays and scalars
+    :return: None
+    """
+
+    if isinstance(obj, np.ndarray):
+        h.update(f'array{obj.dtype.str}{obj.shape}'.encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(f'dict{len(obj)}'.encode())
+        for k in sorted(obj, key=repr):
+            _update(h, k)
+            _update(h, obj[k])
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj
+        h.update(f'{type(obj).__name__}{len(items)}'.encode())
+        for v in items:
+            _update(h, v)
+    elif isinstance(obj, np.generic):
+        _update(h, obj.item())
+    else:
+        h.update(repr(obj).encode())
+
+
+def source_files(func):
+    """
+    :param func: type of function, the solver
+    :return: type of list, sorted source files of the repository the solver depends on: the file defining func
+             and, transitively, every repository module its module imports or takes functions and classes from
+    """
+
+    files, todo = set(), [sys.modules[func.__module__]]
+    while todo:
+        module = todo.pop()
+        path = getattr(module, '__file__', None)
+        if not path or not os.path.abspath(path).startswith(REPO_DIR + os.sep) or path in files:
+            continue
+        files.add(path)
+        for v in vars(module).values():
+            name = v.__name__ if inspect.ismodule(v) else getattr(v, '__module__', None)
+            if isinstance(name, str) and name in sys.modules:
+                todo.append(sys.modules[name])
+
+    return sorted(files)
+
+
+def solver_version(func):
+    """
+    version of everything a solver result depends on besides its inputs
+    :param func: type of function, the solver
+    :return: type of str, versions of the external solvers and a hash of the repository sources func depends on,
+             see source_files, so that editing the solver code or its helpers invalidates its cached results
+    """
+
+    versions = []
+    try:
+        import gurobipy
+        versions.append('gurobi ' + '.'.join(map(str, gurobipy.gurobi.version())))
+    except ImportError:
+        pass
+    try:
+        import z3
+        versions.append('z3 ' + z3.get_version_string())
+    except ImportError:
+        pass
+    h = hashlib.sha1()
+    for path in source_files(func):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    versions.append(h.hexdigest())
+    return ', '.join(versions)
+
+
+def cache_key(func, *data):
+    """
+    :param func: type of function, the solver
+    :param data: instance data and parameters, e.g. pt, po, tt_map, bs_ps, keyword arguments
+    :return: type of str, hex digest identifying a solver run
+    """
+
+    h = hashlib.sha1()
+    _update(h, (func.__module__, func.__qualname__, solver_version(func), data))
+    return h.hexdigest()
+
+
+def _load(key, folder):
+    path = os.path.join(folder, key + '.pkl')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _save(key, entries, folder):
+    # write to a temporary file first, solver processes of the portfolio may save at the same time
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, key + '.pkl')
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(entries, f)
+    os.replace(tmp, path)
+
+
+def cached_solver(solver, folder=RESULT_CACHE_DIR):
+    """
+    wrap a Test_case solver called as solver(case, time_limit, *args, **kwargs), e.g. task_1_gurobi or
+    task_2_gurobi, so that a run on the same instance data with the same solver, version and parameters
+    restores the solution fields of case instead of solving again; a proven optimal result is also reused
+    for any longer time limit
+    :param solver: type of function, the solver
+    :param folder: type of str, folder of cached results
+    :return: wrapper: type of function, same signature as solver
+    """
+
+    @functools.wraps(solver)
+    def wrapper(case, time_limit, *args, **kwargs):
+        key = cache_key(solver, case.pt, case.po, args, kwargs)
+        entries = _load(key, folder)  # time limit -> solution fields
+
+        # same time limit, or proven optimal within a time limit no longer than the requested one
+        hit = entries.get(time_limit)
+        if hit is None:
+            hit = next((e for t, e in sorted(entries.items()) if e['opt'] and t <= time_limit), None)
+        if hit is not None:
+            for k, v in hit.items():
+                setattr(case, k, v)
+            print(f'{solver.__name__} result for {case.name} restored from cache\n')
+            return
+
+        solver(case, time_limit, *args, **kwargs)
+        entries[time_limit] = {k: getattr(case, k) for k in FIELDS}
+        _save(key, entries, folder)
+
+    return wrapper
+
+
+def cached_function(func, folder=RESULT_CACHE_DIR):
+    """
+    wrap a solver that returns its result, e.g. toh or single_robot_brick, so that a call with the same
+    arguments, solver and version returns the stored result instead of solving again
+    :param func: type of function, the solver
+    :param folder: type of str, folder of cached results
+    :return: wrapper: type of function, same signature as func
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = cache_key(func, args, kwargs)
+        entries = _load(key, folder)
+        if 'result' in entries:
+            print(f'{func.__name__} result restored from cache (solved in {entries["time"]:.2f} sec)')
+            return entries['result']
+
+        start_time = time.time()
+        result = func(*args, **kwargs)
+        _save(key, {'result': result, 'time': time.time() - start_time}, folder)
+        return result
+
+    return wrapper
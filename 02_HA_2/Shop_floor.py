@@ -0,0 +1,178 @@
+import numpy as np
+from Shortest_paths import adjacency_matrix, dijkstra, floyd_warshall, shortest_path, transport_time_map
+
+# default shop floor, see figure 1 of the assignment
+X_DIST = [7, 21, 25, 20, 18, 28, 8]  # x-direction distance of shop floor, left to right, in meter
+Y_DIST = [17, 17, 17, 19]  # y-direction distance of shop floor, bottom to top, in meter
+SPD = 5  # transportation speed, 5 m/s
+# aisles as straight runs between two grid crossings (column, row), column c at sum(x_dist[:c]) and row r at
+# sum(y_dist[:r]): rows left to right, then columns bottom to top
+AISLES = [((1, 4), (6, 4)), ((1, 3), (6, 3)), ((0, 2), (3, 2)), ((4, 2), (7, 2)),
+          ((1, 1), (2, 1)), ((3, 1), (4, 1)), ((5, 1), (6, 1)), ((2, 0), (6, 0)),
+          ((1, 1), (1, 4)), ((2, 0), (2, 1)), ((2, 2), (2, 3)), ((3, 0), (3, 3)),
+          ((4, 1), (4, 4)), ((5, 0), (5, 4)), ((6, 0), (6, 3))]
+# grid crossing (column, row) of each location, 1~6: machines, 0: warehouse, 7: delivery
+NODES = [(0, 2), (4, 3), (3, 1), (5, 1), (2, 4), (2, 2), (6, 4), (7, 2)]
+
+
+class ShopFloor:
+    def __init__(self, x_dist=X_DIST, y_dist=Y_DIST, aisles=AISLES, nodes=NODES):
+        """
+        compile an aisle layout into a weighted graph of grid crossings and cache its all-pairs shortest paths
+        :param x_dist: type of list, x-direction distance between grid columns, left to right, in meter
+        :param y_dist: type of list, y-direction distance between grid rows, bottom to top, in meter
+        :param aisles: type of list, ((column, row), (column, row)) straight runs along a row or a column
+        :param nodes: type of list, (column, row) of each location
+        """
+
+        self.x = np.concatenate([[0], np.cumsum(x_dist)])
+        self.y = np.concatenate([[0], np.cumsum(y_dist)])
+        self.rows = len(self.y)
+
+        # an edge between every two neighbouring crossings along an aisle
+        edges = {}
+        for (c0, r0), (c1, r1) in aisles:
+            (c0, c1), (r0, r1) = sorted((c0, c1)), sorted((r0, r1))
+            if r0 == r1:
+                edges.update({(self.vertex((c, r0)), self.vertex((c + 1, r0))): self.x[c + 1] - self.x[c]
+                              for c in range(c0, c1)})
+            elif c0 == c1:
+                edges.update({(self.vertex((c0, r)), self.vertex((c0, r + 1))): self.y[r + 1] - self.y[r]
+                              for r in range(r0, r1)})
+            else:
+                raise ValueError(f'Aisle {(c0, r0)} - {(c1, r1)} is neither a row nor a column')
+
+        self.adj = adjacency_matrix(edges, len(self.x) * self.rows)
+        self.loc = np.array([self.vertex(p) for p in nodes])
+        self.dist, self.pred = floyd_warshall(self.adj)
+
+    def vertex(self, crossing):
+        """
+        :param crossing: type of tuple, (column, row) of a grid crossing
+        :return: type of int, vertex of the crossing in the graph
+        """
+
+        return crossing[0] * self.rows + crossing[1]
+
+    def location_dist(self):
+        """
+        :return: type of np.ndarray, (n, n) shortest distance between every pair of locations in meter
+        """
+
+        return self.dist[np.ix_(self.loc, self.loc)]
+
+    def tt_map(self, spd=SPD):
+        """
+        :param spd: type of float, transportation speed in m/s
+        :return: tt_map: type of dict, shortest transportation time in second, see transport_time_map
+        """
+
+        return transport_time_map(self.location_dist(), spd)
+
+    def direct_dist_map(self):
+        """
+        :return: dist_map: type of dict, distance from location i to location j for i < j along a shortest route
+                 passing no third location, inf if every route does
+        """
+
+        dist_map = {}
+        for i in range(len(self.loc)):
+            # a route may end at another location but not leave it
+            blocked = self.adj.copy()
+            blocked[np.delete(self.loc, i), :] = np.inf
+            dist = dijkstra(blocked, self.loc[i])[0]
+            # meters stay int when they are, as in the literal distance maps
+            dist_map.update({(i, j): int(d) if np.isfinite(d) and d.is_integer() else d
+                             for j, d in ((j, dist[self.loc[j]].item()) for j in range(i + 1, len(self.loc)))})
+
+        return dist_map
+
+    def route(self, i, j):
+        """
+        :param i: type of int, source location
+        :param j: type of int, sink location
+        :return: type of list, (column, row) of the crossings on a shortest route, empty if unreachable
+        """
+
+        return [divmod(v, self.rows) for v in shortest_path(self.pred, self.loc[i], self.loc[j])]
+
+    def set_length(self, a, b, length):
+        """
+        change the length of the aisle between two neighbouring crossings and update the cached shortest paths
+        incrementally: a shorter edge can only improve routes through it, min(d(s, t), d(s, a) + w + d(b, t));
+        a longer edge only affects pairs with a shortest route through it, those entries are reset and
+        rebuilt from the unaffected ones by min-plus doubling
+        :param a: type of tuple, (column, row) of one end
+        :param b: type of tuple, (column, row) of the other end
+        :param length: type of float, new length in meter, np.inf to block the aisle
+        :return: type of int, number of vertex pairs whose distance changed
+        """
+
+        # neighbouring crossings only, any other pair would add an edge cutting across the floor
+        if (abs(a[0] - b[0]) + abs(a[1] - b[1]) != 1 or
+                not all(0 <= c < len(self.x) and 0 <= r < self.rows for c, r in (a, b))):
+            raise ValueError(f'Crossings {a} and {b} are not neighbouring on the grid')
+
+        u, v = self.vertex(a), self.vertex(b)
+        old = self.adj[u, v]
+        if length == old:
+            return 0
+        self.adj[u, v] = self.adj[v, u] = length
+        dist = self.dist
+
+        if length < old:
+            # 1. decrease: route s -> u -> v -> t or s -> v -> u -> t
+            for p, q in ((u, v), (v, u)):
+                via = self.dist[:, p, None] + length + self.dist[None, q, :]
+                better = via < self.dist
+                pred_q = self.pred[q].copy()
+                pred_q[q] = p
+                self.dist = np.where(better, via, self.dist)
+                self.pred = np.where(better, pred_q[None, :], self.pred)
+        else:
+            # 2. increase: pairs with a shortest route over the edge in either direction
+            with np.errstate(invalid='ignore'):
+                hit = ((self.dist[:, u, None] + old + self.dist[None, v, :] == self.dist) |
+                       (self.dist[:, v, None] + old + self.dist[None, u, :] == self.dist))
+            hit &= np.isfinite(self.dist)
+            rows = np.flatnonzero(hit.any(axis=1))
+            # reset them, every new shortest route joins edges and unaffected routes, which stay exact
+            self.dist, self.pred = self.dist.copy(), self.pred.copy()
+            self.dist[hit], self.pred[hit] = np.inf, -1
+            edge = self.adj < self.dist
+            self.dist[edge], self.pred[edge] = self.adj[edge], np.nonzero(edge)[0]
+            # min-plus doubling on the affected rows, s -> k -> t, the graph is undirected
+            cols = np.arange(len(self.adj))
+            while True:
+                via = self.dist[rows][:, :, None] + self.dist[None, :, :]
+                k = via.argmin(axis=1)
+                best = np.take_along_axis(via, k[:, None, :], axis=1)[:, 0, :]
+                better = best < self.dist[rows]
+                if not better.any():
+                    break
+                self.dist[rows] = np.where(better, best, self.dist[rows])
+                self.pred[rows] = np.where(better, self.pred[k, cols], self.pred[rows])
+                self.dist[:, rows] = self.dist[rows].T
+
+        return int((self.dist != dist).sum())
+
+    def block(self, a, b):
+        """
+        :param a: type of tuple, (column, row) of one end of the aisle
+        :param b: type of tuple, (column, row) of the other end
+        :return: type of int, number of vertex pairs whose distance changed
+        """
+
+        return self.set_length(a, b, np.inf)
+
+
+def shop_floor_dist_map(x_dist=X_DIST, y_dist=Y_DIST):
+    """
+    direct distance between every pair of nodes of the shop floor along its aisles
+    :param x_dist: type of list, x-direction distance of shop floor, left to right, in meter
+    :param y_dist: type of list, y-direction distance of shop floor, bottom to top, in meter
+    :return: dist_map: type of dict, distance from node i to node j for i < j, 1~6: machines, 0: warehouse,
+             7: delivery
+    """
+
+    return ShopFloor(x_dist, y_dist).direct_dist_map()
@@ -0,0 +1,232 @@
+import heapq
+import numpy as np
+
+
+def adjacency_matrix(dist_map, num=None, symmetric=True):
+    """
+    convert edge lengths into an array-backed adjacency matrix
+    :param dist_map: type of dict, length of each edge as {(i, j): length}
+    :param num: type of int, number of nodes, None for the largest node in dist_map + 1
+    :param symmetric: type of bool, True if every edge can be used in both directions
+    :return: adj: type of np.ndarray, (num, num) edge lengths, inf without an edge, 0 on the diagonal
+    """
+
+    if num is None:
+        num = max(max(k) for k in dist_map) + 1
+    adj = np.full((num, num), np.inf)
+    (i, j), v = np.array(list(dist_map.keys())).T, np.array(list(dist_map.values()), dtype=float)
+    adj[i, j] = np.minimum(adj[i, j], v)
+    if symmetric:
+        adj[j, i] = np.minimum(adj[j, i], v)
+    np.fill_diagonal(adj, 0)
+
+    return adj
+
+
+def dijkstra(adj, source, sink=None, h=None):
+    """
+    single-source shortest paths with non-negative edge lengths, or A* towards sink with a heuristic
+    :param adj: type of np.ndarray, (n, n) edge lengths, inf without an edge
+    :param source: type of int, source node
+    :param sink: type of int, stop once its distance is final, None to settle every node
+    :param h: type of np.ndarray, (n,) consistent lower bound on the distance from each node to sink,
+              e.g. landmark_heuristic, None for plain Dijkstra
+    :return: dist: type of np.ndarray, (n,) distance from source, inf if unreached (or not settled with sink)
+             pred: type of np.ndarray, (n,) node before each node on its shortest path, -1 if none
+    """
+
+    n = len(adj)
+    h = np.zeros(n) if h is None else h
+    dist, pred = np.full(n, np.inf), np.full(n, -1)
+    dist[source] = 0
+    done = np.zeros(n, dtype=bool)
+    heap = [(h[source], source)]
+    while heap:
+        f, u = heapq.heappop(heap)
+        if done[u]:
+            continue
+        done[u] = True
+        if u == sink:
+            break
+        # relax every edge out of u
+        nbr = np.flatnonzero(np.isfinite(adj[u]) & ~done)
+        alt = dist[u] + adj[u, nbr]
+        better = alt < dist[nbr]
+        for v, d in zip(nbr[better].tolist(), alt[better].tolist()):
+            dist[v], pred[v] = d, u
+            heapq.heappush(heap, (d + h[v], v))
+
+    if sink is not None:
+        dist[~done] = np.inf
+    return dist, pred
+
+
+def landmark_heuristic(adj, sink, landmarks=2):
+    """
+    ALT heuristic: by the triangle inequality d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L)
+    for every landmark L, which is admissible and consistent
+    :param adj: type of np.ndarray, (n, n) edge lengths, inf without an edge
+    :param sink: type of int, target node
+    :param landmarks: type of int or list, number of landmarks picked farthest first from sink, or the nodes
+    :return: h: type of np.ndarray, (n,) lower bound on the distance from each node to sink
+    """
+
+    if isinstance(landmarks, int):
+        picked, d_min = [], dijkstra(adj, sink)[0]
+        for _ in range(landmarks):
+            far = np.where(np.isfinite(d_min), d_min, -1)
+            picked.append(int(far.argmax()))
+            d_min = np.minimum(d_min, dijkstra(adj, picked[-1])[0])
+        landmarks = picked
+
+    h = np.zeros(len(adj))
+    for L in landmarks:
+        d_from = dijkstra(adj, L)[0]  # d(L, v)
+        d_to = dijkstra(adj.T, L)[0]  # d(v, L)
+        with np.errstate(invalid='ignore'):
+            bound = np.fmax(d_from[sink] - d_from, d_to - d_to[sink])
+        h = np.fmax(h, np.where(np.isfinite(bound), bound, 0))
+    return h
+
+
+def floyd_warshall(adj):
+    """
+    all-pairs shortest paths, one vectorized relaxation through each intermediate node
+    :param adj: type of np.ndarray, (n, n) edge lengths, inf without an edge, negative lengths allowed
+    :return: dist: type of np.ndarray, (n, n) shortest distance from node i to node j, inf if unreachable
+             pred: type of np.ndarray, (n, n) node before j on a shortest path from i to j, -1 if none
+    """
+
+    n = len(adj)
+    dist = adj.astype(float)
+    np.fill_diagonal(dist, np.minimum(dist.diagonal(), 0))
+    pred = np.where(np.isfinite(adj), np.arange(n)[:, None], -1)
+    np.fill_diagonal(pred, -1)
+
+    for k in range(n):
+        via = dist[:, k, None] + dist[None, k, :]
+        better = via < dist
+        dist = np.where(better, via, dist)
+        pred = np.where(better, pred[k][None, :], pred)
+    if (dist.diagonal() < 0).any():
+        raise ValueError('Negative cycle in the graph')
+
+    return dist, pred
+
+
+def johnson(adj):
+    """
+    all-pairs shortest paths for sparse graphs: Bellman-Ford potentials make every edge non-negative,
+    then one Dijkstra per source
+    :param adj: type of np.ndarray, (n, n) edge lengths, inf without an edge, negative lengths allowed
+    :return: dist, pred: as in floyd_warshall
+    """
+
+    n = len(adj)
+    off = adj.copy()
+    np.fill_diagonal(off, np.inf)
+
+    # potentials: shortest distance from a virtual node linked to every node with length 0
+    phi = np.zeros(n)
+    for _ in range(n):
+        new = np.minimum(phi, (phi[:, None] + off).min(axis=0))
+        if (new == phi).all():
+            break
+        phi = new
+    else:
+        raise ValueError('Negative cycle in the graph')
+
+    # reweighted edges are non-negative: w'(u, v) = w(u, v) + phi(u) - phi(v)
+    with np.errstate(invalid='ignore'):
+        reweighted = np.where(np.isfinite(adj), adj + phi[:, None] - phi[None, :], np.inf)
+    dist, pred = np.empty((n, n)), np.empty((n, n), dtype=int)
+    for s in range(n):
+        dist[s], pred[s] = dijkstra(reweighted, s)
+    dist += phi[None, :] - phi[:, None]
+
+    return dist, pred
+
+
+def shortest_path(pred, source, sink):
+    """
+    :param pred: type of np.ndarray, (n, n) predecessor matrix of floyd_warshall or johnson, or (n,) of dijkstra
+    :param source: type of int, source node
+    :param sink: type of int, sink node
+    :return: path: type of list, nodes from source to sink, empty if sink is unreachable
+    """
+
+    row = pred[source] if pred.ndim == 2 else pred
+    path = [sink]
+    while path[-1] != source:
+        if row[path[-1]] < 0:
+            return []
+        path.append(int(row[path[-1]]))
+    return path[::-1]
+
+
+def path_length(adj, path):
+    """
+    :param adj: type of np.ndarray, (n, n) edge lengths
+    :param path: type of list, nodes in visit order
+    :return: type of float, total length of the edges along path
+    """
+
+    return adj[path[:-1], path[1:]].sum().item()
+
+
+def k_shortest_paths(adj, source, sink):
+    """
+    Yen's algorithm: simple paths from source to sink in order of length, generated lazily so that the caller
+    can stop at any time; the next path deviates from a found one at some spur node, found by Dijkstra with
+    the nodes of the shared root and the edges already used after that root removed
+    :param adj: type of np.ndarray, (n, n) non-negative edge lengths, inf without an edge
+    :param source: type of int, source node
+    :param sink: type of int, sink node
+    :return: generator of (length, path), path: type of list, nodes from source to sink
+    """
+
+    dist, pred = dijkstra(adj, source, sink)
+    if not np.isfinite(dist[sink]):
+        return
+    found = [shortest_path(pred, source, sink)]
+    yield dist[sink].item(), found[0]
+
+    candidates, seen = [], {tuple(found[0])}  # heap of (length, path)
+    while True:
+        prev = found[-1]
+        for i in range(len(prev) - 1):
+            spur, root = prev[i], prev[:i + 1]
+            blocked = adj.copy()
+            # edges leaving the root of found paths sharing this root
+            for path in found:
+                if path[:i + 1] == root:
+                    blocked[path[i], path[i + 1]] = np.inf
+            # nodes of the root before the spur node, so that the path stays simple
+            blocked[root[:-1], :] = np.inf
+            blocked[:, root[:-1]] = np.inf
+
+            d, p = dijkstra(blocked, spur, sink)
+            if np.isfinite(d[sink]):
+                path = root[:-1] + shortest_path(p, spur, sink)
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(candidates, (path_length(adj, path), path))
+
+        if not candidates:
+            return
+        length, path = heapq.heappop(candidates)
+        found.append(path)
+        yield length, path
+
+
+def transport_time_map(dist, spd):
+    """
+    convert shop floor distances into tt_map of task_2_gurobi
+    :param dist: type of np.ndarray, (n, n) shortest distance in meter, 0: warehouse, 1~n-2: machines, n-1: delivery
+    :param spd: type of float, transportation speed in m/s
+    :return: tt_map: type of dict, shortest transportation time in second, 0~n-3: machines, n-2: delivery,
+             -1: warehouse
+    """
+
+    n = len(dist)
+    return {(i - 1, j - 1): dist[i, j].item() / spd for i in range(n) for j in range(n) if i != j}
@@ -0,0 +1,190 @@
+import os
+import csv
+import json
+import time
+from Read_test_case import *
+from Task_1_portfolio import SOLVERS
+from Task_1_validator import validate_case
+
+# best known makespan of the benchmark instances (optimal where proven)
+BKS = {'ft06': 55, 'ft10': 930, 'ft20': 1165,
+       'la01': 666, 'la02': 655, 'la03': 597, 'la04': 590, 'la05': 593,
+       'la06': 926, 'la07': 890, 'la08': 863, 'la09': 951, 'la10': 958,
+       'la11': 1222, 'la12': 1039, 'la13': 1150, 'la14': 1292, 'la15': 1207,
+       'la16': 945, 'la17': 784, 'la18': 848, 'la19': 842, 'la20': 902,
+       'la21': 1046, 'la22': 927, 'la23': 1032, 'la24': 935, 'la25': 977,
+       'la26': 1218, 'la27': 1235, 'la28': 1216, 'la29': 1152, 'la30': 1355,
+       'la31': 1784, 'la32': 1850, 'la33': 1719, 'la34': 1721, 'la35': 1888,
+       'la36': 1268, 'la37': 1397, 'la38': 1196, 'la39': 1233, 'la40': 1222,
+       'abz5': 1234, 'abz6': 943, 'abz7': 656, 'abz8': 648, 'abz9': 678,
+       'ta01': 1231, 'ta02': 1244, 'ta03': 1218, 'ta04': 1175, 'ta05': 1224,
+       'ta06': 1238, 'ta07': 1227, 'ta08': 1217, 'ta09': 1274, 'ta10': 1241,
+       'ta11': 1357, 'ta12': 1367, 'ta13': 1342, 'ta14': 1345, 'ta15': 1339,
+       'ta16': 1360, 'ta17': 1462, 'ta18': 1396, 'ta19': 1332, 'ta20': 1348,
+       'ta21': 1642, 'ta22': 1600, 'ta23': 1557, 'ta24': 1644, 'ta25': 1595,
+       'ta26': 1643, 'ta27': 1680, 'ta28': 1603, 'ta29': 1625, 'ta30': 1584,
+       'ta31': 1764, 'ta32': 1784, 'ta33': 1791, 'ta34': 1829, 'ta35': 2007,
+       'ta36': 1819, 'ta37': 1771, 'ta38': 1673, 'ta39': 1795, 'ta40': 1669,
+       'ta41': 2005, 'ta42': 1937, 'ta43': 1846, 'ta44': 1979, 'ta45': 2000,
+       'ta46': 2004, 'ta47': 1889, 'ta48': 1937, 'ta49': 1960, 'ta50': 1923,
+       'ta51': 2760, 'ta52': 2756, 'ta53': 2717, 'ta54': 2839, 'ta55': 2679,
+       'ta56': 2781, 'ta57': 2943, 'ta58': 2885, 'ta59': 2655, 'ta60': 2723,
+       'ta61': 2868, 'ta62': 2869, 'ta63': 2755, 'ta64': 2702, 'ta65': 2725,
+       'ta66': 2845, 'ta67': 2825, 'ta68': 2784, 'ta69': 3071, 'ta70': 2995,
+       'ta71': 5464, 'ta72': 5181, 'ta73': 5568, 'ta74': 5339, 'ta75': 5392,
+       'ta76': 5342, 'ta77': 5436, 'ta78': 5394, 'ta79': 5358, 'ta80': 5183}
+
+# benchmark suites by instance name
+SUITES = {'ft': ['ft06', 'ft10', 'ft20'],
+          'la': [f'la{i:02d}' for i in range(1, 41)],
+          'abz': [f'abz{i}' for i in range(5, 10)],
+          'ta': [f'ta{i:02d}' for i in range(1, 81)]}
+
+# solver configurations by label: (solver name, keyword arguments), see SOLVERS
+CONFIGS = {'gurobi-original': ('gurobi', {'formulation': 'original'}),
+           'gurobi-symmetric-ws': ('gurobi', {'formulation': 'symmetric', 'warm_start': True}),
+           'z3-optimize-ws': ('z3', {'warm_start': True}),
+           'gurobi-symmetric-ws-presolve': ('gurobi', {'formulation': 'symmetric', 'warm_start': True,
+                                                       'tighten': True}),
+           'z3-bisection-ws': ('z3', {'warm_start': True, 'mode': 'bisection'}),
+           'z3-bisection-ws-presolve': ('z3', {'warm_start': True, 'mode': 'bisection', 'tighten': True}),
+           'cp-ws': ('cp', {'warm_start': True}),
+           'lns-gurobi': ('lns', {'backend': 'gurobi'})}
+
+# result fields in csv column order
+FIELDS = ['instance', 'config', 'jobs', 'machines', 'bks', 'obj', 'lb', 'opt', 'feasible', 'gap',
+          'build_time', 'solve_time', 'time_to_target', 'primal_integral', 'trajectory']
+
+
+def run_benchmark(instances, configs=CONFIGS, time_limit=20, target_gap=0.01, folder=TEST_CASE_DIR):
+    """
+    run every solver configuration on every instance available in folder
+    :param instances: type of list, instance names, e.g. SUITES['la']
+    :param configs: type of dict, label -> (solver name, keyword arguments)
+    :param time_limit: type of int, time limit for each solver run in min
+    :param target_gap: type of float, relative gap to the best known value that counts as reaching the target
+    :param folder: type of str, folder of test case files
+    :return: results: type of list, one dict per instance and configuration with the fields in FIELDS
+    """
+
+    results = []
+    for name in instances:
+        try:
+            case = read_test_case([name], folder)[0]
+        except FileNotFoundError:
+            print(f'Skip {name}: not found in {folder}\n')
+            continue
+        bks = BKS.get(case.name)
+
+        for label, (solver, kwargs) in configs.items():
+            each = TestCase(case.name, case.size, case.pt, case.po)
+            SOLVERS[solver](each, time_limit, **kwargs)
+            solved = isinstance(each.obj, (int, np.integer))
+            results.append({'instance': each.name,
+                            'config': label,
+                            'jobs': each.size[0],
+                            'machines': each.size[1],
+                            'bks': bks,
+                            'obj': int(each.obj) if solved else None,
+                            'lb': each.lb,
+                            'opt': each.opt,
+                            'feasible': validate_case(each) if solved else None,
+                            'gap': (int(each.obj) - bks) / bks if solved and bks else None,
+                            'build_time': each.bt,
+                            'solve_time': each.st,
+                            'time_to_target': each.time_to_within(100 * target_gap, bks) if bks else None,
+                            'primal_integral': each.primal_integral(bks) if solved else None,
+                            'trajectory': [list(p) for p in each.trj]})
+
+    return results
+
+
+def save_results(results, path):
+    """
+    :param results: type of list, output of run_benchmark
+    :param path: type of str, output path without extension, written as .json and .csv
+    :return: None
+    """
+
+    with open(f'{path}.json', 'w') as f:
+        json.dump({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}, f, indent=1)
+    with open(f'{path}.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        for r in results:
+            writer.writerow({**r, 'trajectory': json.dumps(r['trajectory'])})
+
+
+def load_results(path):
+    """
+    :param path: type of str, output path of save_results without extension
+    :return: results: type of list, as returned by run_benchmark
+    """
+
+    with open(f'{path}.json') as f:
+        return json.load(f)['results']
+
+
+def regression_check(results, baseline, time_tol=0.2, min_time=1.0):
+    """
+    compare results with a baseline run and flag configurations that got worse or slower
+    :param results: type of list, output of run_benchmark
+    :param baseline: type of list, output of run_benchmark (or load_results) of an earlier run
+    :param time_tol: type of float, relative solve time increase that counts as slower
+    :param min_time: type of float, solve time increase in second below which nothing is flagged
+    :return: flags: type of list, (instance, config, reason)
+    """
+
+    old = {(r['instance'], r['config']): r for r in baseline}
+    flags = []
+    for r in results:
+        b = old.get((r['instance'], r['config']))
+        if b is None:
+            continue
+        if b['obj'] is not None and (r['obj'] is None or r['obj'] > b['obj']):
+            flags.append((r['instance'], r['config'], f'objective {b["obj"]} -> {r["obj"]}'))
+        if r['feasible'] is False:
+            flags.append((r['instance'], r['config'], 'infeasible schedule'))
+        if b['opt'] and not r['opt']:
+            flags.append((r['instance'], r['config'], 'no longer proven optimal'))
+        if r['solve_time'] - b['solve_time'] > max(min_time, time_tol * b['solve_time']):
+            flags.append((r['instance'], r['config'],
+                          f'solve time {b["solve_time"]:.2f} -> {r["solve_time"]:.2f} sec'))
+
+    return flags
+
+
+def main():
+    # params
+    instances = SUITES['ft'] + SUITES['la'][:5]  # instance names, see SUITES
+    time_limit = 20  # time limit for each solver run in min
+    path = 'benchmark_results'  # output path without extension
+    baseline = 'benchmark_baseline'  # earlier output path to check for regressions
+
+    # run and save
+    results = run_benchmark(instances, CONFIGS, time_limit)
+    save_results(results, path)
+
+    # check results
+    print('\n*******************************************'
+          '\n********* Benchmark results below *********'
+          '\n*******************************************\n')
+    print(f'{"Instance":<10}{"Config":<30}{"BKS":>6}{"Obj":>6}{"Gap":>8}{"Build":>9}{"Solve":>9}{"To target":>11}'
+          f'{"Primal int.":>13}')
+    for r in results:
+        gap = f'{100 * r["gap"]:.1f}%' if r['gap'] is not None else '-'
+        ttt = f'{r["time_to_target"]:.2f}s' if r['time_to_target'] is not None else '-'
+        pi = f'{r["primal_integral"]:.2f}s' if r['primal_integral'] is not None else '-'
+        print(f'{r["instance"]:<10}{r["config"]:<30}{str(r["bks"]):>6}{str(r["obj"]):>6}{gap:>8}'
+              f'{r["build_time"]:>8.2f}s{r["solve_time"]:>8.2f}s{ttt:>11}{pi:>13}')
+
+    # check regressions
+    if os.path.exists(f'{baseline}.json'):
+        flags = regression_check(results, load_results(baseline))
+        print(f'\n{len(flags)} regression(s) against {baseline}')
+        for flag in flags:
+            print(*flag, sep='\t')
+
+
+if __name__ == '__main__':
+    main()
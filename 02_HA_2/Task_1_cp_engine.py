@@ -0,0 +1,468 @@
+import time
+import numpy as np
+from Task_1_dispatch_rules import best_dispatch
+from Task_1_presolve import presolve
+
+NEG = -10 ** 12  # minus infinity for earliest completion times
+
+
+class ThetaLambdaTree:
+    """
+    balanced binary tree over the activities of one machine sorted by earliest start, holding a set of white
+    activities (theta) and gray activities (lambda), see Vilim, "Global Constraints in Scheduling", 2007
+    """
+
+    def __init__(self, est, p, white=True, gray=True):
+        """
+        :param est: type of list, earliest start of each activity
+        :param p: type of list, processing time of each activity
+        :param white: type of bool, True to start with every activity in theta, False for an empty tree
+        :param gray: type of bool, False for a theta tree without lambda, which is cheaper to update
+        """
+
+        n = len(est)
+        self.est, self.p = est, p
+        self.size = 1
+        while self.size < n:
+            self.size *= 2
+        # leaf position of each activity in non-decreasing order of earliest start
+        self.pos = [0] * n
+        for leaf, a in enumerate(sorted(range(n), key=lambda a: est[a])):
+            self.pos[a] = self.size + leaf
+        # sum of processing times, earliest completion time, the same with at most one gray activity,
+        # and the gray activity responsible for each of the last two (-1 if none)
+        self.sp = [0] * (2 * self.size)
+        self.ect = [NEG] * (2 * self.size)
+        self.sp_gray = [0] * (2 * self.size)
+        self.ect_gray = [NEG] * (2 * self.size)
+        self.resp_sp = [-1] * (2 * self.size)
+        self.resp_ect = [-1] * (2 * self.size)
+        self.state = [0] * n  # 0: empty, 1: white, 2: gray
+        self.gray = gray
+        if white:
+            for a in range(n):
+                self._leaf(a, 1)
+            for v in range(self.size - 1, 0, -1):
+                self._combine(v)
+
+    def _leaf(self, a, state):
+        v = self.pos[a]
+        self.state[a] = state
+        if state == 1:
+            self.sp[v], self.ect[v] = self.p[a], self.est[a] + self.p[a]
+            self.sp_gray[v], self.ect_gray[v] = self.sp[v], self.ect[v]
+            self.resp_sp[v] = self.resp_ect[v] = -1
+        elif state == 2:
+            self.sp[v], self.ect[v] = 0, NEG
+            self.sp_gray[v], self.ect_gray[v] = self.p[a], self.est[a] + self.p[a]
+            self.resp_sp[v] = self.resp_ect[v] = a
+        else:
+            self.sp[v], self.ect[v] = 0, NEG
+            self.sp_gray[v], self.ect_gray[v] = 0, NEG
+            self.resp_sp[v] = self.resp_ect[v] = -1
+        return v
+
+    def _combine(self, v):
+        l, r = 2 * v, 2 * v + 1
+        sp, ect, sp_gray, ect_gray = self.sp, self.ect, self.sp_gray, self.ect_gray
+        sp[v] = sp[l] + sp[r]
+        ect[v] = max(ect[r], ect[l] + sp[r])
+        if not self.gray:
+            return
+        # at most one gray activity, either in the left or in the right subtree
+        a, b = sp_gray[l] + sp[r], sp[l] + sp_gray[r]
+        if a >= b:
+            sp_gray[v], self.resp_sp[v] = a, self.resp_sp[l]
+        else:
+            sp_gray[v], self.resp_sp[v] = b, self.resp_sp[r]
+        a, b, c = ect_gray[r], ect[l] + sp_gray[r], ect_gray[l] + sp[r]
+        if a >= b and a >= c:
+            ect_gray[v], self.resp_ect[v] = a, self.resp_ect[r]
+        elif b >= c:
+            ect_gray[v], self.resp_ect[v] = b, self.resp_sp[r]
+        else:
+            ect_gray[v], self.resp_ect[v] = c, self.resp_ect[l]
+
+    def set(self, a, state):
+        """
+        :param a: type of int, activity
+        :param state: type of int, 0 to remove, 1 to add to theta, 2 to move to lambda
+        :return: None
+        """
+
+        v = self._leaf(a, state) // 2
+        while v:
+            self._combine(v)
+            v //= 2
+
+    def ect_theta(self):
+        return self.ect[1]
+
+    def ect_lambda(self):
+        return self.ect_gray[1], self.resp_ect[1]
+
+
+def detectable_precedences(est, lct, p):
+    """
+    raise earliest starts by the activities detected to precede each activity: j << i if est_i + p_i > lct_j - p_j
+    :param est: type of list, earliest start of each activity on one machine
+    :param lct: type of list, latest completion of each activity
+    :param p: type of list, processing time of each activity
+    :return: new: type of list, earliest starts after propagation
+    """
+
+    n = len(est)
+    tree = ThetaLambdaTree(est, p, white=False, gray=False)
+    new = est[:]
+    by_lst = sorted(range(n), key=lambda a: lct[a] - p[a])
+    q = 0
+    for i in sorted(range(n), key=lambda a: est[a] + p[a]):
+        while q < n and est[i] + p[i] > lct[by_lst[q]] - p[by_lst[q]]:
+            tree.set(by_lst[q], 1)
+            q += 1
+        if tree.state[i]:
+            tree.set(i, 0)
+            new[i] = max(new[i], tree.ect_theta())
+            tree.set(i, 1)
+        else:
+            new[i] = max(new[i], tree.ect_theta())
+    return new
+
+
+def not_last(est, lct, p):
+    """
+    lower latest completions of activities that cannot be last among the activities starting before they end
+    :param est: type of list, earliest start of each activity on one machine
+    :param lct: type of list, latest completion of each activity
+    :param p: type of list, processing time of each activity
+    :return: new: type of list, latest completions after propagation
+    """
+
+    n = len(est)
+    tree = ThetaLambdaTree(est, p, white=False, gray=False)
+    new = lct[:]
+    by_lst = sorted(range(n), key=lambda a: lct[a] - p[a])
+    q = 0
+    for i in sorted(range(n), key=lambda a: lct[a]):
+        while q < n and lct[i] > lct[by_lst[q]] - p[by_lst[q]]:
+            tree.set(by_lst[q], 1)
+            q += 1
+        if not q:
+            continue
+        if tree.state[i]:
+            tree.set(i, 0)
+            e = tree.ect_theta()
+            tree.set(i, 1)
+        else:
+            e = tree.ect_theta()
+        if e > lct[i] - p[i]:
+            # i ends before the latest start of some other activity in theta, the last one has the largest
+            j = by_lst[q - 1] if by_lst[q - 1] != i else by_lst[q - 2]
+            new[i] = min(new[i], lct[j] - p[j])
+    return new
+
+
+def edge_finding(est, lct, p):
+    """
+    raise earliest starts of activities that must end after a set of other activities, fail on overload
+    :param est: type of list, earliest start of each activity on one machine
+    :param lct: type of list, latest completion of each activity
+    :param p: type of list, processing time of each activity
+    :return: new: type of list, earliest starts after propagation, None if the machine is overloaded
+    """
+
+    n = len(est)
+    tree = ThetaLambdaTree(est, p)
+    new = est[:]
+    order = sorted(range(n), key=lambda a: -lct[a])
+    if tree.ect_theta() > lct[order[0]]:
+        return None
+    for k in range(n - 1):
+        tree.set(order[k], 2)
+        j = order[k + 1]
+        if tree.ect_theta() > lct[j]:
+            return None
+        # a gray activity that would end after lct_j together with theta must end after all of theta
+        ect, i = tree.ect_lambda()
+        while ect > lct[j]:
+            new[i] = max(new[i], tree.ect_theta())
+            tree.set(i, 0)
+            ect, i = tree.ect_lambda()
+    return new
+
+
+def mirror(propagator, est, lct, p):
+    """
+    run a propagator of earliest starts on the time-reversed machine to bound latest completions instead
+    :return: new: type of list, latest completions after propagation (or earliest starts for not_last),
+             None on failure
+    """
+
+    new = propagator([-v for v in lct], [-v for v in est], p)
+    return None if new is None else [-v for v in new]
+
+
+class JobShopCP:
+    """
+    constraint model of a job shop: one interval variable per operation (earliest start, latest completion),
+    job precedences and posted machine orders as precedence arcs, one disjunctive resource per machine
+    """
+
+    def __init__(self, case, pre):
+        """
+        :param case: type of Test_case
+        :param pre: type of tuple, output of presolve (est, lst, order, lb, ub)
+        """
+
+        n, m = case.size
+        self.n, self.m = n, m
+        # operation o = i * m + k is job i on machine k
+        self.p = case.pt.ravel().tolist()
+        self.machines = [[i * m + k for i in range(n)] for k in range(m)]
+        self.succ = [[] for _ in range(n * m)]
+        self.pred = [[] for _ in range(n * m)]
+        # 1. job precedences
+        for i in range(n):
+            for j in range(m - 1):
+                self.post(i * m + case.po[i, j].item(), i * m + case.po[i, j + 1].item())
+        # 2. machine orders fixed by presolve
+        for (i, j, k), before in pre[2].items():
+            if before:
+                self.post(i * m + k, j * m + k)
+            else:
+                self.post(j * m + k, i * m + k)
+        self.est0 = pre[0].ravel().tolist()
+        self.lct0 = (pre[1] + case.pt).ravel().tolist()
+        self.trail = []  # machine orders posted during search, undone on backtracking
+
+    def post(self, a, b, trail=False):
+        """
+        :param a: type of int, operation before b
+        :param b: type of int, operation after a
+        :param trail: type of bool, True if posted during search
+        :return: None
+        """
+
+        self.succ[a].append(b)
+        self.pred[b].append(a)
+        if trail:
+            self.trail.append((a, b))
+
+    def undo(self, size):
+        """
+        :param size: type of int, length of the trail to go back to
+        :return: None
+        """
+
+        while len(self.trail) > size:
+            a, b = self.trail.pop()
+            self.succ[a].pop()
+            self.pred[b].pop()
+
+    def propagate(self, est, lct, changed):
+        """
+        precedence and disjunctive propagation until a fixpoint
+        :param est: type of list, earliest starts, modified in place
+        :param lct: type of list, latest completions, modified in place
+        :param changed: type of list, operations whose bounds changed
+        :return: type of bool, False on failure
+        """
+
+        p, m = self.p, self.m
+        queue = list(changed)
+        dirty = set(o % m for o in changed)
+        while queue or dirty:
+            # 1. precedences: est_b >= est_a + p_a and lct_a <= lct_b - p_b
+            while queue:
+                o = queue.pop()
+                if est[o] + p[o] > lct[o]:
+                    return False
+                for s in self.succ[o]:
+                    if est[o] + p[o] > est[s]:
+                        est[s] = est[o] + p[o]
+                        queue.append(s)
+                        dirty.add(s % m)
+                for r in self.pred[o]:
+                    if lct[o] - p[o] < lct[r]:
+                        lct[r] = lct[o] - p[o]
+                        queue.append(r)
+                        dirty.add(r % m)
+
+            # 2. disjunctive resources
+            if dirty:
+                k = dirty.pop()
+                ops = self.machines[k]
+                e, l, d = [est[o] for o in ops], [lct[o] for o in ops], [p[o] for o in ops]
+                # edge-finding on both sides, failing on overload
+                new_e = edge_finding(e, l, d)
+                new_l = mirror(edge_finding, e, l, d)
+                if new_e is None or new_l is None:
+                    return False
+                # detectable precedences and not-first on earliest starts
+                new_e = list(map(max, new_e, detectable_precedences(e, l, d), mirror(not_last, e, l, d)))
+                # detectable precedences and not-last on latest completions
+                new_l = list(map(min, new_l, mirror(detectable_precedences, e, l, d), not_last(e, l, d)))
+                for a, o in enumerate(ops):
+                    if new_e[a] > est[o] or new_l[a] < lct[o]:
+                        est[o], lct[o] = new_e[a], new_l[a]
+                        if est[o] + p[o] > lct[o]:
+                            return False
+                        queue.append(o)
+                        dirty.add(k)
+
+        return True
+
+    def conflict(self, est, lct, rng):
+        """
+        pick an unresolved pair of operations overlapping in the earliest start schedule, most constrained first;
+        as in the disjunctions of the gurobi and z3 models, an operation without processing time may not start
+        strictly inside another one on its machine
+        :param est: type of list, earliest starts
+        :param lct: type of list, latest completions
+        :param rng: type of np.random.Generator, breaks ties between pairs
+        :return: type of tuple, (a, b, slack of a before b, slack of b before a), None if the earliest start
+                 schedule is feasible
+        """
+
+        p = self.p
+        best, key = None, None
+        for ops in self.machines:
+            ops = sorted(ops, key=lambda o: est[o])
+            last = ops[0]
+            for o in ops[1:]:
+                if est[o] < est[last] + p[last] and p[last] and (p[o] or est[o] > est[last]):
+                    ab = lct[o] - est[last] - p[last] - p[o]
+                    ba = lct[last] - est[o] - p[o] - p[last]
+                    k = max(ab, ba) + rng.random()
+                    if key is None or k < key:
+                        best, key = (last, o, ab, ba), k
+                    break
+                if est[o] + p[o] > est[last] + p[last]:
+                    last = o
+        return best
+
+    def search(self, bound, node_limit, deadline, guide, rng):
+        """
+        depth-first branch-and-bound on machine orders for a schedule with makespan <= bound
+        :param bound: type of int, makespan upper bound
+        :param node_limit: type of int, number of nodes before giving up
+        :param deadline: type of float, time.time() before giving up
+        :param guide: type of list, start times of the incumbent to order branches (solution-guided), None if none
+        :param rng: type of np.random.Generator
+        :return: status: type of str, 'sat', 'unsat' (search exhausted), 'limit' (node or time limit)
+                 sch: type of list, start time of each operation if 'sat'
+                 nodes: type of int, nodes explored
+        """
+
+        self.undo(0)
+        est = self.est0[:]
+        lct = [min(v, bound) for v in self.lct0]
+        if not self.propagate(est, lct, range(len(est))):
+            return 'unsat', None, 0
+
+        stack = [(est, lct, 0, None)]
+        nodes = 0
+        while stack:
+            est, lct, size, arc = stack.pop()
+            if arc is not None:
+                nodes += 1
+                if nodes > node_limit or nodes % 100 == 0 and time.time() > deadline:
+                    return 'limit', None, nodes
+                self.undo(size)
+                est, lct = est[:], lct[:]
+                self.post(*arc, trail=True)
+                if not self.propagate(est, lct, arc):
+                    continue
+
+            c = self.conflict(est, lct, rng)
+            if c is None:
+                return 'sat', est, nodes
+
+            # branch: larger slack first, or the order of the incumbent
+            a, b, ab, ba = c
+            first = guide[a] <= guide[b] if guide is not None else ab >= ba
+            size = len(self.trail)
+            arcs = [(a, b), (b, a)] if first else [(b, a), (a, b)]
+            stack.append((est, lct, size, arcs[1]))
+            stack.append((est, lct, size, arcs[0]))
+
+        return 'unsat', None, nodes
+
+
+def task_1_cp(case, time_limit, warm_start=False, seed=0, node_limit=1000, growth=1.5):
+    """
+    solver for a single test case using the native constraint programming engine: interval propagation,
+    detectable precedences, not-first/not-last and edge-finding on each machine, branch-and-bound on machine
+    orders with restarts
+    :param case: type of Test_case
+    :param time_limit: type of int, time limit for the solver in min
+    :param warm_start: type of bool, True to start from the best dispatching rule schedule
+    :param seed: type of int, seed for tie-breaking between equally constrained pairs
+    :param node_limit: type of int, nodes of the first restart
+    :param growth: type of float, factor on the node limit after every restart without a result
+    :return: None (in-place modification on case.obj and case.sch)
+    """
+
+    print(f'CP starts solving {case.name}...\n')
+
+    # no solution fields of an earlier solver on the same case survive this one
+    case.opt, case.lb, case.trj = False, None, []
+
+    # compute execution time
+    start_time = time.time()
+    deadline = start_time + time_limit * 60
+    rng = np.random.default_rng(seed)
+
+    # warm start from dispatching rules
+    if warm_start and case.ws_obj is None:
+        best_dispatch(case)
+
+    # model: domains and fixed orders from presolve
+    pre = presolve(case)
+    model = JobShopCP(case, pre)
+    lb = pre[3]
+    if warm_start:
+        ub, sch = case.ws_obj, case.ws_sch.copy()
+        bound = ub - 1
+    else:
+        ub, sch = None, None
+        bound = pre[4]
+    bt = time.time() - start_time
+
+    # trajectory of (time, ub, lb, nodes) after each restart
+    trj = [(bt, ub, lb, 0)]
+
+    # restarts: each search looks for a schedule with makespan <= bound, a complete search without one
+    # proves the incumbent optimal
+    nodes = 0
+    while (ub is None or lb < ub) and time.time() < deadline:
+        guide = sch.ravel().tolist() if sch is not None else None
+        status, found, k = model.search(bound, node_limit, deadline, guide, rng)
+        nodes += k
+        if status == 'sat':
+            sch = np.array(found, dtype=int).reshape(case.size)
+            ub = int((sch + case.pt).max())
+            bound = ub - 1
+            trj.append((time.time() - start_time, ub, lb, nodes))
+            print(f'Schedule with makespan {ub}, {nodes} nodes, {trj[-1][0]:.2f} sec')
+        elif status == 'unsat':
+            lb = bound + 1
+            trj.append((time.time() - start_time, ub, lb, nodes))
+            break
+        else:
+            node_limit = int(node_limit * growth)
+
+    # execution time
+    et = time.time() - start_time
+
+    # in-place modify case
+    case.slv = 'CP'
+    case.time = f'{int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms'
+    case.bt, case.st, case.trj = bt, et - bt, trj
+    case.lb = lb
+    if ub is None:
+        case.obj = case.sch = f'No solution found within {time_limit} min'
+        case.opt = False
+    else:
+        case.obj, case.sch = ub, sch
+        case.opt = lb == ub
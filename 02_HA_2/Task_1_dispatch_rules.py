@@ -0,0 +1,91 @@
+import time
+import numpy as np
+
+# priority rules: the conflicting operation with the smallest key is dispatched first
+# SPT: shortest processing time, LPT: longest processing time, MWKR: most work remaining,
+# FIFO: earliest possible start, RANDOM: random priority (for random restarts)
+RULES = ('SPT', 'LPT', 'MWKR', 'FIFO')
+
+
+def dispatch(case, rule='SPT', rng=None):
+    """
+    build an active schedule by Giffler-Thompson dispatching under a priority rule
+    :param case: type of Test_case
+    :param rule: type of str, one of RULES or 'RANDOM'
+    :param rng: type of np.random.Generator, only used by 'RANDOM', None for a fresh unseeded one
+    :return: obj: type of int, makespan of the schedule
+             sch: type of np.ndarray, schedule (start time) in the same layout as case.sch
+    """
+
+    n, m = case.size
+    jobs = np.arange(n)
+    if rule == 'RANDOM' and rng is None:
+        rng = np.random.default_rng()
+
+    # state: index of the next operation in po, ready time of each job and machine, remaining work of each job
+    nxt = np.zeros(n, dtype=int)
+    job_ready, machine_ready = np.zeros(n, dtype=int), np.zeros(m, dtype=int)
+    work = case.pt.sum(axis=1)
+    sch = np.zeros((n, m), dtype=int)
+
+    for _ in range(n * m):
+        # schedulable operations: the next operation of every unfinished job
+        act = jobs[nxt < m]
+        mcs = case.po[act, nxt[act]]
+        pts = case.pt[act, mcs]
+        est = np.maximum(job_ready[act], machine_ready[mcs])
+        ect = est + pts
+
+        # conflict set: operations on the machine of the earliest completion that can start before it completes,
+        # itself included when it takes no time
+        k = ect.argmin()
+        conflict = np.flatnonzero((mcs == mcs[k]) & (est < ect[k]) | (np.arange(len(act)) == k))
+
+        # pick an operation from the conflict set by priority
+        if rule == 'SPT':
+            key = pts[conflict]
+        elif rule == 'LPT':
+            key = -pts[conflict]
+        elif rule == 'MWKR':
+            key = -work[act[conflict]]
+        elif rule == 'FIFO':
+            key = est[conflict]
+        elif rule == 'RANDOM':
+            key = rng.random(len(conflict))
+        else:
+            raise ValueError(f'Unknown dispatching rule: {rule}')
+        c = conflict[key.argmin()]
+
+        # schedule the chosen operation
+        i, mc = act[c], mcs[c]
+        sch[i, mc] = est[c]
+        job_ready[i] = machine_ready[mc] = ect[c]
+        work[i] -= pts[c]
+        nxt[i] += 1
+
+    return int(job_ready.max()), sch
+
+
+def best_dispatch(case, rules=RULES, restarts=20, seed=0):
+    """
+    run every priority rule plus random restarts and keep the best schedule on case as a warm start
+    :param case: type of Test_case
+    :param rules: type of tuple, deterministic priority rules to try
+    :param restarts: type of int, number of random-priority restarts
+    :param seed: type of int, seed for the random restarts
+    :return: None (in-place modification on case.ws_obj, case.ws_sch and case.ws_rule)
+    """
+
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+
+    best = (None, None, None)
+    for rule in list(rules) + ['RANDOM'] * restarts:
+        obj, sch = dispatch(case, rule, rng)
+        if best[0] is None or obj < best[0]:
+            best = (obj, sch, rule)
+
+    case.ws_obj, case.ws_sch, case.ws_rule = best
+    et = time.time() - start_time
+    print(f'Best dispatching rule for {case.name}: {case.ws_rule} with makespan {case.ws_obj} '
+          f'({int(1e3 * et)} ms)\n')
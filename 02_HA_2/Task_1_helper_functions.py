@@ -1,36 +1,78 @@
 import time
+import tracemalloc
 import gurobipy as gb
 import z3
 import numpy as np
+from Task_1_dispatch_rules import best_dispatch
+from Task_1_presolve import horizon, trivial_lower_bound, presolve
 
 
-def task_1_gurobi(case, time_limit):
+def build_task_1_gurobi(case, formulation='original', pre=None):
     """
-    solver for a single test case in a variable size using gurobi
+    build the model of a single test case using gurobi
     :param case: type of Test_case
-    :param time_limit: type of int, time limit for the solver in min
-    :return: None (in-place modification on case.obj and case.sch)
+    :param formulation: type of str, 'original' for y on every ordered pair of jobs with a loose big-M,
+                        'symmetric' for y on every unordered pair of jobs with big-M from a feasible horizon
+    :param pre: type of tuple, output of presolve (est, lst, order, lb, ub) to bound start times and total
+                execution time and to fix orders, None for no presolve
+    :return: m: type of gurobi Model
+             x: type of tupledict, start time
+             y: type of tupledict, mutual exclusion
+             z: type of Var, total execution time
     """
 
-    print(f'Gurobi starts solving {case.name}...\n')
-
-    # compute execution time
-    start_time = time.time()
-
     # model for task 1 using gurobi
     m = gb.Model('task_1_gurobi')
 
-    # set time limit in sec
-    m.Params.TimeLimit = int(time_limit * 60)
+    if formulation == 'original':
+        # decision variable
+        x = m.addVars(case.size[0], case.size[1], vtype=gb.GRB.INTEGER, name='start time')
+        y = m.addVars(case.size[0], case.size[0], case.size[1], vtype=gb.GRB.BINARY,
+                      name='mutual exclusion for each pair of jobs on each machine')
+        z = m.addVar(vtype=gb.GRB.INTEGER, name='total execution time')
 
-    # decision variable
-    x = m.addVars(case.size[0], case.size[1], vtype=gb.GRB.INTEGER, name='start time')
-    y = m.addVars(case.size[0], case.size[0], case.size[1], vtype=gb.GRB.BINARY,
-                  name='mutual exclusion for each pair of jobs on each machine')
-    z = m.addVar(vtype=gb.GRB.INTEGER, name='total execution time')
+        # big-M
+        M = case.pt.max() * case.size[0] * case.size[1]
+    elif formulation == 'symmetric':
+        # horizon: no job can end later than the makespan of a feasible schedule
+        H = horizon(case)
+        # time windows of start times
+        est, lst = (pre[0], pre[1]) if pre is not None else (np.zeros(case.size, dtype=int), H - case.pt)
 
-    # big-M
-    M = case.pt.max() * case.size[0] * case.size[1]
+        # decision variable
+        x = m.addVars(case.size[0], case.size[1], ub={(i, k): lst[i, k].item()
+                                                      for i in range(case.size[0])
+                                                      for k in range(case.size[1])},
+                      vtype=gb.GRB.INTEGER, name='start time')
+        y = m.addVars([(i, j, k)
+                       for k in range(case.size[1])
+                       for i in range(case.size[0] - 1)
+                       for j in range(i + 1, case.size[0])],
+                      vtype=gb.GRB.BINARY, name='job i before job j on each machine')
+        z = m.addVar(ub=H, vtype=gb.GRB.INTEGER, name='total execution time')
+
+        # big-M of each pair: x_i + p_i - x_j never exceeds lst_i + p_i - est_j within the time windows,
+        # which is H without presolve
+        M = {(i, j, k): (lst[i, k] + case.pt[i, k] - est[j, k]).item()
+             for i in range(case.size[0])
+             for j in range(case.size[0])
+             for k in range(case.size[1])
+             if i != j}
+    else:
+        raise ValueError(f'Unknown formulation: {formulation}')
+
+    # presolve: time windows of start times, bounds of total execution time and fixed orders
+    if pre is not None:
+        est, lst, order, lb, ub = pre
+        for (i, k), v in x.items():
+            v.LB, v.UB = est[i, k].item(), lst[i, k].item()
+        z.LB, z.UB = lb, ub
+        for (i, j, k), before in order.items():
+            if formulation == 'original':  # y = 1 <-> job i after job j
+                y[i, j, k].LB = y[i, j, k].UB = int(not before)
+                y[j, i, k].LB = y[j, i, k].UB = int(before)
+            else:  # y = 1 <-> job i before job j
+                y[i, j, k].LB = y[i, j, k].UB = int(before)
 
     # constraints
     # 1. for each job: start time + processing time <= next start time
@@ -39,68 +81,378 @@ def task_1_gurobi(case, time_limit):
                  for j in range(case.size[1] - 1))
     # 2. for each job: the last start time + processing time <= total execution time
     m.addConstrs(x[i, case.po[i, -1]] + case.pt[i, case.po[i, -1]] <= z for i in range(case.size[0]))
-    # 3. mutual exclusion for each machine: x_i ends before x_j starts -> y = 0
-    m.addConstrs(x[i, m] + case.pt[i, m] <= x[j, m] + M * y[i, j, m]
-                 for m in range(case.size[1])
-                 for i in range(case.size[0])
-                 for j in range(case.size[0])
-                 if i != j)
-    # 4. mutual exclusion for each machine: x_i starts after x_j ends -> y = 1
-    m.addConstrs(x[i, m] >= x[j, m] + case.pt[j, m] - M * (1 - y[i, j, m])
-                 for m in range(case.size[1])
-                 for i in range(case.size[0])
-                 for j in range(case.size[0])
-                 if i != j)
+    if formulation == 'original':
+        # 3. mutual exclusion for each machine: x_i ends before x_j starts -> y = 0
+        m.addConstrs(x[i, m] + case.pt[i, m] <= x[j, m] + M * y[i, j, m]
+                     for m in range(case.size[1])
+                     for i in range(case.size[0])
+                     for j in range(case.size[0])
+                     if i != j)
+        # 4. mutual exclusion for each machine: x_i starts after x_j ends -> y = 1
+        m.addConstrs(x[i, m] >= x[j, m] + case.pt[j, m] - M * (1 - y[i, j, m])
+                     for m in range(case.size[1])
+                     for i in range(case.size[0])
+                     for j in range(case.size[0])
+                     if i != j)
+    else:
+        # 3. mutual exclusion for each machine: y = 1 -> x_i ends before x_j starts
+        m.addConstrs(x[i, k] + case.pt[i, k] <= x[j, k] + M[i, j, k] * (1 - y[i, j, k]) for i, j, k in y.keys())
+        # 4. mutual exclusion for each machine: y = 0 -> x_j ends before x_i starts
+        m.addConstrs(x[j, k] + case.pt[j, k] <= x[i, k] + M[j, i, k] * y[i, j, k] for i, j, k in y.keys())
 
     # objective: minimize total execution time
     m.setObjective(z, gb.GRB.MINIMIZE)
 
-    # solve
-    m.optimize()
+    return m, x, y, z
+
+
+def build_task_1_gurobi_matrix(case, formulation='original', pre=None):
+    """
+    build the same model as build_task_1_gurobi from the pt/po arrays with the gurobi matrix API: one MVar per
+    variable group and one vectorized constraint per constraint group instead of one LinExpr per constraint
+    :param case: type of Test_case
+    :param formulation: type of str, 'original' or 'symmetric', see build_task_1_gurobi
+    :param pre: type of tuple, output of presolve (est, lst, order, lb, ub), None for no presolve
+    :return: m: type of gurobi Model
+             x: type of tupledict, start time
+             y: type of tupledict, mutual exclusion
+             z: type of Var, total execution time
+    """
+
+    n, mc = case.size
+    pt, po = case.pt, case.po
+    rows = np.arange(n)
+
+    # model for task 1 using gurobi
+    m = gb.Model('task_1_gurobi')
+
+    if formulation == 'original':
+        # decision variable
+        x = m.addMVar((n, mc), vtype=gb.GRB.INTEGER, name='start time')
+        y = m.addMVar((n, n, mc), vtype=gb.GRB.BINARY, name='mutual exclusion for each pair of jobs on each machine')
+        z = m.addVar(vtype=gb.GRB.INTEGER, name='total execution time')
+
+        # every ordered pair of different jobs on each machine, in the order of build_task_1_gurobi
+        K, I, J = np.nonzero(~np.eye(n, dtype=bool)[None].repeat(mc, axis=0))
+
+        # big-M
+        M = pt.max() * n * mc
+    elif formulation == 'symmetric':
+        # horizon and time windows of start times
+        H = horizon(case)
+        est, lst = (pre[0], pre[1]) if pre is not None else (np.zeros(case.size, dtype=int), H - pt)
+
+        # every pair i < j on each machine, in the order of build_task_1_gurobi
+        I, J = np.triu_indices(n, 1)
+        I, J, K = np.tile(I, mc), np.tile(J, mc), np.repeat(np.arange(mc), len(I))
+
+        # decision variable
+        x = m.addMVar((n, mc), ub=lst, vtype=gb.GRB.INTEGER, name='start time')
+        y = m.addMVar(len(I), vtype=gb.GRB.BINARY, name='job i before job j on each machine')
+        z = m.addVar(ub=H, vtype=gb.GRB.INTEGER, name='total execution time')
+    else:
+        raise ValueError(f'Unknown formulation: {formulation}')
+
+    # presolve: time windows of start times, bounds of total execution time and fixed orders
+    if pre is not None:
+        est, lst, order, lb, ub = pre
+        x.LB, x.UB = est, lst
+        z.LB, z.UB = lb, ub
+        if order:
+            i, j, k = np.array(list(order.keys())).T
+            before = np.array(list(order.values()), dtype=int)
+            lo, up = np.zeros(y.shape), np.ones(y.shape)
+            if formulation == 'original':  # y = 1 <-> job i after job j
+                lo[i, j, k] = up[i, j, k] = 1 - before
+                lo[j, i, k] = up[j, i, k] = before
+            else:  # y = 1 <-> job i before job j, pair (i, j) on machine k at k * n(n-1)/2 + row-major rank
+                idx = k * (n * (n - 1) // 2) + i * (2 * n - i - 1) // 2 + (j - i - 1)
+                lo[idx] = up[idx] = before
+            y.LB, y.UB = lo, up
+
+    # constraints
+    # 1. for each job: start time + processing time <= next start time
+    a, b = po[:, :-1], po[:, 1:]
+    m.addConstr(x[rows[:, None], a] + pt[rows[:, None], a] <= x[rows[:, None], b])
+    # 2. for each job: the last start time + processing time <= total execution time
+    m.addConstr(x[rows, po[:, -1]] + pt[rows, po[:, -1]] <= z)
+    if formulation == 'original':
+        # 3. mutual exclusion for each machine: x_i ends before x_j starts -> y = 0
+        m.addConstr(x[I, K] + pt[I, K] <= x[J, K] + M * y[I, J, K])
+        # 4. mutual exclusion for each machine: x_i starts after x_j ends -> y = 1
+        m.addConstr(x[I, K] >= x[J, K] + pt[J, K] - M * (1 - y[I, J, K]))
+    else:
+        # big-M of each pair from the time windows, see build_task_1_gurobi
+        M_ij = lst[I, K] + pt[I, K] - est[J, K]
+        M_ji = lst[J, K] + pt[J, K] - est[I, K]
+        # 3. mutual exclusion for each machine: y = 1 -> x_i ends before x_j starts
+        m.addConstr(x[I, K] + pt[I, K] <= x[J, K] + M_ij * (1 - y))
+        # 4. mutual exclusion for each machine: y = 0 -> x_j ends before x_i starts
+        m.addConstr(x[J, K] + pt[J, K] <= x[I, K] + M_ji * y)
+
+    # objective: minimize total execution time
+    m.setObjective(z, gb.GRB.MINIMIZE)
+    m.update()
+
+    # variables keyed as in build_task_1_gurobi
+    x = gb.tupledict(zip(zip(*np.indices(case.size).reshape(2, -1).tolist()), x.reshape(-1).tolist()))
+    if formulation == 'original':
+        y = gb.tupledict(zip(zip(*np.indices((n, n, mc)).reshape(3, -1).tolist()), y.reshape(-1).tolist()))
+    else:
+        y = gb.tupledict(zip(zip(I.tolist(), J.tolist(), K.tolist()), y.tolist()))
+
+    return m, x, y, z
+
+
+def measure_build(build, *args):
+    """
+    build time and peak python memory of a model builder, measured in two separate runs since tracing
+    allocations slows down the build
+    :param build: type of function, returning a gurobi model as first element, e.g. build_task_1_gurobi
+    :param args: arguments of build
+    :return: type of dict, build time in second, peak traced memory in MB, number of vars, constrs and non-zeros
+    """
+
+    start_time = time.time()
+    m = build(*args)[0]
+    m.update()
+    bt = time.time() - start_time
+    m.dispose()
+
+    tracemalloc.start()
+    m = build(*args)[0]
+    m.update()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    report = {'time': bt, 'memory': peak, 'vars': m.NumVars, 'constrs': m.NumConstrs, 'nonzeros': m.NumNZs}
+    m.dispose()
+    return report
+
+
+def print_builder_report(report):
+    """
+    :param report: type of list, dicts with the keys 'case', 'builder' and those of measure_build
+    :return: None
+    """
+
+    print(f'{"Case":<10}{"Builder":<24}{"Vars":>8}{"Constrs":>9}{"Non-zeros":>11}{"Time":>10}{"Memory":>11}')
+    for r in report:
+        print(f'{r["case"]:<10}{r["builder"]:<24}{r["vars"]:>8}{r["constrs"]:>9}{r["nonzeros"]:>11}'
+              f'{r["time"]:>9.3f}s{r["memory"]:>8.1f} MB')
+
+
+def task_1_compare_builders(cases, formulations=('original', 'symmetric')):
+    """
+    compare build time and peak python memory of build_task_1_gurobi and build_task_1_gurobi_matrix
+    :param cases: type of list, Test_case objects
+    :param formulations: type of tuple, formulations to compare, see build_task_1_gurobi
+    :return: report: type of list, one dict per case, formulation and builder
+    """
+
+    report = []
+    for case in cases:
+        for formulation in formulations:
+            for builder in (build_task_1_gurobi, build_task_1_gurobi_matrix):
+                report.append({'case': case.name,
+                               'builder': f'{formulation} {"matrix" if "matrix" in builder.__name__ else "loop"}',
+                               **measure_build(builder, case, formulation)})
+
+    print_builder_report(report)
+    return report
+
+
+def trajectory_callback(trj, offset=0.):
+    """
+    gurobi callback recording the trajectory of a MIP solve
+    :param trj: type of list, where (time in second, incumbent, best bound, node count) is appended
+    :param offset: type of float, time in second already spent before optimize, e.g. on model build
+    :return: callback: type of function, to be passed to Model.optimize
+    """
+
+    def callback(model, where):
+        if where == gb.GRB.Callback.MIPSOL:
+            # new incumbent
+            point = (offset + model.cbGet(gb.GRB.Callback.RUNTIME),
+                     model.cbGet(gb.GRB.Callback.MIPSOL_OBJ),
+                     model.cbGet(gb.GRB.Callback.MIPSOL_OBJBND),
+                     int(model.cbGet(gb.GRB.Callback.MIPSOL_NODCNT)))
+        elif where == gb.GRB.Callback.MIP:
+            # progress, only kept when the incumbent or the bound moved
+            point = (offset + model.cbGet(gb.GRB.Callback.RUNTIME),
+                     model.cbGet(gb.GRB.Callback.MIP_OBJBST),
+                     model.cbGet(gb.GRB.Callback.MIP_OBJBND),
+                     int(model.cbGet(gb.GRB.Callback.MIP_NODCNT)))
+            if point[1] >= gb.GRB.INFINITY:
+                point = (point[0], None) + point[2:]
+            if trj and trj[-1][1:3] == point[1:3]:
+                return
+        else:
+            return
+        trj.append(point)
+
+    return callback
+
+
+def set_gurobi_start(sch, obj, x, y, z, formulation='original'):
+    """
+    set a schedule as the MIP start of a model built by build_task_1_gurobi
+    :param sch: type of np.ndarray, schedule (start time) in second, e.g. case.ws_sch
+    :param obj: type of int, makespan of the schedule
+    :param x: type of tupledict, start time
+    :param y: type of tupledict, mutual exclusion
+    :param z: type of Var, total execution time
+    :param formulation: type of str, formulation the model was built with
+    :return: None
+    """
+
+    for (i, k), v in x.items():
+        v.Start = sch[i, k]
+    for (i, j, k), v in y.items():
+        if formulation == 'original':  # y = 1 <-> job i after job j
+            v.Start = int(sch[i, k] > sch[j, k])
+        else:  # y = 1 <-> job i before job j
+            v.Start = int(sch[i, k] < sch[j, k])
+    z.Start = obj
+
+
+def task_1_gurobi(case, time_limit, formulation='original', warm_start=False, params=None, tighten=False,
+                  builder='loop'):
+    """
+    solver for a single test case in a variable size using gurobi
+    :param case: type of Test_case
+    :param time_limit: type of int, time limit for the solver in min
+    :param formulation: type of str, 'original' or 'symmetric', see build_task_1_gurobi
+    :param warm_start: type of bool, True to start from the best dispatching rule schedule
+    :param params: type of dict, extra gurobi parameters, e.g. {'MIPFocus': 1, 'Threads': 4}
+    :param tighten: type of bool, True to bound and fix the model by presolve, see Task_1_presolve.py
+    :param builder: type of str, 'loop' for build_task_1_gurobi, 'matrix' for build_task_1_gurobi_matrix
+    :return: None (in-place modification on case.obj and case.sch)
+    """
+
+    print(f'Gurobi starts solving {case.name}...\n')
+
+    # no solution fields of an earlier solver on the same case survive this one
+    case.opt, case.lb, case.trj = False, None, []
+
+    # compute execution time
+    start_time = time.time()
+
+    # warm start from dispatching rules
+    if warm_start and case.ws_obj is None:
+        best_dispatch(case)
+
+    # model for task 1 using gurobi
+    build = {'loop': build_task_1_gurobi, 'matrix': build_task_1_gurobi_matrix}[builder]
+    m, x, y, z = build(case, formulation, presolve(case) if tighten else None)
+    if warm_start:
+        set_gurobi_start(case.ws_sch, case.ws_obj, x, y, z, formulation)
+
+    # set time limit in sec
+    m.Params.TimeLimit = int(time_limit * 60)
+    # set extra parameters
+    for k, v in (params or {}).items():
+        m.setParam(k, v)
+    bt = time.time() - start_time
+
+    # solve, recording the trajectory
+    trj = []
+    m.optimize(trajectory_callback(trj, bt))
 
     # execution time
     et = time.time() - start_time
     # in-place modify case
     case.slv = 'Gurobi'
+    case.bt, case.st, case.trj = bt, et - bt, trj
+    case.opt = m.Status == gb.GRB.OPTIMAL
     case.time = f'{int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms'
     try:
+        case.lb = int(np.ceil(m.ObjBound - 1e-6))
         case.obj = int(z.X)
-    except:
-        case.obj = f'No solution found within {time_limit} min'
-    try:
         case.sch = np.zeros(case.size, dtype=int)
         for k, v in x.items():
             case.sch[k[0], k[1]] = v.X
+        case.trj.append((et, case.obj, case.lb, int(m.NodeCount)))
     except:
-        case.sch = f'No solution found within {time_limit} min'
+        fallback(case, time_limit)
 
 
-def task_1_z3(case, time_limit):
+def fallback(case, time_limit):
     """
-    solver for a single test case in a variable size using z3
+    fill in case when the solver finds no solution: the warm start schedule if there is one, otherwise a message
     :param case: type of Test_case
     :param time_limit: type of int, time limit for the solver in min
-    :return: None (in-place modification on case.obj and case.sch)
+    :return: None (in-place modification on case.slv, case.obj and case.sch)
     """
 
-    print(f'Z3 starts solving {case.name}...\n')
+    if case.ws_obj is not None:
+        case.slv += f' (no solution within {time_limit} min, {case.ws_rule} dispatching rule fallback)'
+        case.obj, case.sch = case.ws_obj, case.ws_sch.copy()
+    else:
+        case.obj = case.sch = f'No solution found within {time_limit} min'
 
-    # compute execution time
-    start_time = time.time()
 
-    # model for task 1 using Z3
-    s = z3.Optimize()
+def task_1_compare_formulations(cases, time_limit, formulations=('original', 'symmetric')):
+    """
+    compare model size and time to optimal of gurobi formulations
+    :param cases: type of list, Test_case objects
+    :param time_limit: type of int, time limit for the solver in min
+    :param formulations: type of tuple, formulations to compare, see build_task_1_gurobi
+    :return: report: type of list, one dict per case and formulation
+    """
+
+    report = []
+    for case in cases:
+        for formulation in formulations:
+            m, x, y, z = build_task_1_gurobi(case, formulation)
+            m.Params.OutputFlag = 0
+            m.Params.TimeLimit = int(time_limit * 60)
+            m.optimize()
+            report.append({'case': case.name,
+                           'formulation': formulation,
+                           'vars': m.NumVars,
+                           'bin_vars': m.NumBinVars,
+                           'constrs': m.NumConstrs,
+                           'obj': int(round(z.X)) if m.SolCount else None,
+                           'optimal': m.Status == gb.GRB.OPTIMAL,
+                           'time': m.Runtime})
+
+    print(f'{"Case":<8}{"Formulation":<12}{"Vars":>8}{"Binary":>8}{"Constrs":>9}{"Obj":>8}{"Optimal":>9}{"Time":>10}')
+    for r in report:
+        print(f'{r["case"]:<8}{r["formulation"]:<12}{r["vars"]:>8}{r["bin_vars"]:>8}{r["constrs"]:>9}'
+              f'{str(r["obj"]):>8}{str(r["optimal"]):>9}{r["time"]:>9.2f}s')
+
+    return report
 
-    # set time limit in milli sec
-    z3.set_option(timeout=int(time_limit * 60 * 1000))
+
+def build_task_1_z3(case, y=None, pre=None):
+    """
+    build the constraints of a single test case using z3
+    :param case: type of Test_case
+    :param y: type of dict, None for plain disjunctions, otherwise filled with a Bool y[i, j, m] per pair i < j on
+              each machine, True <-> job i before job j, so that orders can be fixed by assumptions
+    :param pre: type of tuple, output of presolve (est, lst, order, lb, ub) to bound start times and total
+                execution time and to fix orders, None for no presolve
+    :return: x: type of list, start time x[i][j] of job i on machine j
+             obj: type of Int, total execution time
+             constraints: type of list, all constraints
+    """
 
     # decision variable
     x = [[z3.Int(f'x_{i}_{j}') for j in range(case.size[1])] for i in range(case.size[0])]  # start time
     obj = z3.Int('obj')  # total execution time
 
     # domain of decision variable
-    d = case.pt.sum() - case.pt.min()
-    domain = [z3.And(0 <= x[i][j], x[i][j] <= d.item()) for i in range(case.size[0]) for j in range(case.size[1])]
+    if pre is None:
+        d = case.pt.sum() - case.pt.min()
+        domain = [z3.And(0 <= x[i][j], x[i][j] <= d.item())
+                  for i in range(case.size[0]) for j in range(case.size[1])]
+        order = {}
+    else:
+        est, lst, order, lb, ub = pre
+        domain = [z3.And(est[i, j].item() <= x[i][j], x[i][j] <= lst[i, j].item())
+                  for i in range(case.size[0]) for j in range(case.size[1])]
+        domain += [lb <= obj, obj <= ub]
 
     # constraints
     # 1. processing order
@@ -108,37 +460,186 @@ def task_1_z3(case, time_limit):
                         x[i][case.po[i, j + 1].item()]
                         for i in range(case.size[0])
                         for j in range(case.size[1] - 1)]
-    # 2. mutual exclusion
-    mutual_exclusion = [z3.Or(x[i][m] + case.pt[i, m].item() <= x[j][m], x[i][m] >= x[j][m] + case.pt[j, m].item())
-                        for m in range(case.size[1])
-                        for i in range(case.size[0] - 1)
-                        for j in range(i + 1, case.size[0])]
+    # 2. mutual exclusion, orders fixed by presolve as plain precedences
+    if y is None:
+        mutual_exclusion = [z3.Or(x[i][m] + case.pt[i, m].item() <= x[j][m],
+                                  x[i][m] >= x[j][m] + case.pt[j, m].item())
+                            if (i, j, m) not in order else
+                            x[i][m] + case.pt[i, m].item() <= x[j][m]
+                            if order[i, j, m] else
+                            x[i][m] >= x[j][m] + case.pt[j, m].item()
+                            for m in range(case.size[1])
+                            for i in range(case.size[0] - 1)
+                            for j in range(i + 1, case.size[0])]
+    else:
+        y.update({(i, j, m): z3.Bool(f'y_{i}_{j}_{m}')
+                  for m in range(case.size[1])
+                  for i in range(case.size[0] - 1)
+                  for j in range(i + 1, case.size[0])})
+        mutual_exclusion = [z3.If(v, x[i][m] + case.pt[i, m].item() <= x[j][m],
+                                  x[i][m] >= x[j][m] + case.pt[j, m].item())
+                            for (i, j, m), v in y.items()]
+        mutual_exclusion += [v if order[k] else z3.Not(v) for k, v in y.items() if k in order]
 
     # objective
     objective = [x[i][case.po[i, -1].item()] + case.pt[i, case.po[i, -1].item()].item() <= obj
                  for i in range(case.size[0])]
 
+    return x, obj, domain + processing_order + mutual_exclusion + objective
+
+
+def task_1_z3(case, time_limit, warm_start=False, mode='optimize', tighten=False):
+    """
+    solver for a single test case in a variable size using z3
+    :param case: type of Test_case
+    :param time_limit: type of int, time limit for the solver in min
+    :param warm_start: type of bool, True to bound obj by the best dispatching rule schedule
+    :param mode: type of str, 'optimize' for z3.Optimize, 'bisection' or 'descent' for makespan probes
+                 on a single incremental z3.Solver, see task_1_z3_probe
+    :param tighten: type of bool, True to bound and fix the model by presolve, see Task_1_presolve.py
+    :return: None (in-place modification on case.obj and case.sch)
+    """
+
+    if mode != 'optimize':
+        task_1_z3_probe(case, time_limit, warm_start, mode, tighten)
+        return
+
+    print(f'Z3 starts solving {case.name}...\n')
+
+    # no solution fields of an earlier solver on the same case survive this one
+    case.opt, case.lb, case.trj = False, None, []
+
+    # compute execution time
+    start_time = time.time()
+
+    # warm start from dispatching rules
+    if warm_start and case.ws_obj is None:
+        best_dispatch(case)
+
+    # model for task 1 using Z3
+    s = z3.Optimize()
+
+    # set time limit in milli sec
+    z3.set_option(timeout=int(time_limit * 60 * 1000))
+
     # add all constraints
-    s.add(domain + processing_order + mutual_exclusion + objective)
+    x, obj, constraints = build_task_1_z3(case, pre=presolve(case) if tighten else None)
+    s.add(constraints)
+    # upper bound from the warm start schedule
+    if warm_start:
+        s.add(obj <= case.ws_obj)
+
+    bt = time.time() - start_time
+
+    # record every improving model found during optimization
+    trj = []
+    s.set_on_model(lambda model: trj.append((time.time() - start_time,
+                                             model.eval(obj, model_completion=True).as_long(), None, None)))
 
     # solve
     s.minimize(obj)
-    s.check()
+    res = s.check()
 
     # execution time
     et = time.time() - start_time
 
     # in-place modify case
     case.slv = 'Z3'
+    case.bt, case.st, case.trj = bt, et - bt, trj
+    case.opt = res == z3.sat
     case.time = f'{int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms'
     try:
         case.obj = s.model()[obj].as_long()
-    except:
-        case.obj = f'No solution found within {time_limit} min'
-    try:
         case.sch = np.zeros(case.size, dtype=int)
         for i in range(case.size[0]):
             for j in range(case.size[1]):
                 case.sch[i][j] = s.model()[x[i][j]].as_long()
+        if case.opt:
+            case.lb = case.obj
+        case.trj.append((et, case.obj, case.lb, None))
     except:
-        case.sch = f'No solution found within {time_limit} min'
+        fallback(case, time_limit)
+
+
+def task_1_z3_probe(case, time_limit, warm_start=False, mode='bisection', tighten=False):
+    """
+    solver for a single test case using z3 makespan probes: each probe checks obj <= k under an assumption
+    literal on one incremental z3.Solver, so clauses learned in earlier probes are kept
+    :param case: type of Test_case
+    :param time_limit: type of int, time limit for the solver in min
+    :param warm_start: type of bool, True to start from the best dispatching rule schedule as upper bound
+    :param mode: type of str, 'bisection' to probe the middle of [lb, ub), 'descent' to probe ub - 1
+    :param tighten: type of bool, True to bound and fix the model by presolve, see Task_1_presolve.py
+    :return: None (in-place modification on case.obj, case.sch and case.lb)
+    """
+
+    print(f'Z3 ({mode}) starts solving {case.name}...\n')
+
+    # no solution fields of an earlier solver on the same case survive this one
+    case.opt, case.lb, case.trj = False, None, []
+
+    # compute execution time
+    start_time = time.time()
+    deadline = start_time + time_limit * 60
+
+    # warm start from dispatching rules
+    if warm_start and case.ws_obj is None:
+        best_dispatch(case)
+
+    # model for task 1 using Z3
+    s = z3.Solver()
+    pre = presolve(case) if tighten else None
+    x, obj, constraints = build_task_1_z3(case, pre=pre)
+    s.add(constraints)
+
+    # bounds: lb is proven, ub is the makespan of the best schedule found so far
+    lb = trivial_lower_bound(case) if pre is None else pre[3]
+    ub, sch = (case.ws_obj, case.ws_sch.copy()) if warm_start else (None, None)
+    s.add(obj >= lb)
+    bt = time.time() - start_time
+
+    # trajectory of (time, ub, lb, None) after each probe
+    trj = [(bt, ub, lb, None)] if warm_start else []
+
+    while (ub is None or lb < ub) and time.time() < deadline:
+        # probe: is there a schedule with obj <= k? the first one without warm start uses a feasible horizon
+        if ub is None:
+            k = horizon(case)
+        elif mode == 'bisection':
+            k = (lb + ub - 1) // 2
+        elif mode == 'descent':
+            k = ub - 1
+        else:
+            raise ValueError(f'Unknown mode: {mode}')
+        s.set('timeout', max(1, int(1e3 * (deadline - time.time()))))
+        probe = z3.Bool(f'obj_le_{k}')
+        s.add(z3.Implies(probe, obj <= k))
+        res = s.check(probe)
+
+        if res == z3.sat:
+            # keep the schedule, its makespan may be below k
+            model = s.model()
+            sch = np.array([[model[x[i][j]].as_long() for j in range(case.size[1])] for i in range(case.size[0])])
+            ub = int((sch + case.pt).max())
+        elif res == z3.unsat:
+            # obj <= k is infeasible: keep it as a permanent bound
+            lb = k + 1
+            s.add(obj >= lb)
+        else:
+            break
+        trj.append((time.time() - start_time, ub, lb, None))
+        print(f'Probe obj <= {k}: {res}, lb = {lb}, ub = {ub}, {trj[-1][0]:.2f} sec')
+
+    # execution time
+    et = time.time() - start_time
+
+    # in-place modify case
+    case.slv = f'Z3 ({mode})'
+    case.time = f'{int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms'
+    case.bt, case.st, case.trj = bt, et - bt, trj
+    case.lb = lb
+    if ub is None:
+        fallback(case, time_limit)
+    else:
+        case.obj, case.sch = ub, sch
+        case.opt = lb == ub
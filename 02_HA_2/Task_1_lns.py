@@ -0,0 +1,190 @@
+import time
+import gurobipy as gb
+import z3
+import numpy as np
+from Task_1_dispatch_rules import best_dispatch
+from Task_1_helper_functions import build_task_1_gurobi, build_task_1_z3, trivial_lower_bound
+
+# neighborhoods: operations freed around a random time window, on random machines or of random jobs
+NEIGHBORHOODS = ('window', 'machines', 'jobs')
+
+
+def neighborhood(case, sch, obj, kind, frac, rng):
+    """
+    choose the operations to re-optimize, all others keep their order on each machine
+    :param case: type of Test_case
+    :param sch: type of np.ndarray, current schedule (start time)
+    :param obj: type of int, makespan of the current schedule
+    :param kind: type of str, one of NEIGHBORHOODS
+    :param frac: type of float, target fraction of operations to free
+    :param rng: type of np.random.Generator
+    :return: free: type of np.ndarray, (n, m) True for operations to re-optimize
+    """
+
+    n, m = case.size
+    if kind == 'window':
+        w = frac * obj
+        t0 = rng.uniform(0, max(obj - w, 0))
+        return (t0 <= sch) & (sch < t0 + w)
+    free = np.zeros((n, m), dtype=bool)
+    if kind == 'machines':
+        free[:, rng.choice(m, max(1, round(frac * m)), replace=False)] = True
+    elif kind == 'jobs':
+        free[rng.choice(n, max(2, round(frac * n)), replace=False)] = True
+    else:
+        raise ValueError(f'Unknown neighborhood: {kind}')
+    return free
+
+
+class GurobiSubproblem:
+    """
+    symmetric gurobi model built once, each neighborhood fixes the order binaries between operations kept in place
+    """
+
+    def __init__(self, case):
+        self.case = case
+        self.m, self.x, self.y, self.z = build_task_1_gurobi(case, 'symmetric')
+        self.m.Params.OutputFlag = 0
+        self.xs = [self.x[i, k] for i in range(case.size[0]) for k in range(case.size[1])]
+        self.ys = list(self.y.values())
+        self.I, self.J, self.K = (np.array(a) for a in zip(*self.y.keys()))
+
+    def solve(self, sch, obj, free, time_limit):
+        """
+        :param sch: type of np.ndarray, current schedule (start time)
+        :param obj: type of int, makespan of the current schedule
+        :param free: type of np.ndarray, (n, m) True for operations to re-optimize
+        :param time_limit: type of float, time limit in second
+        :return: sch: type of np.ndarray, best schedule found, None if none
+                 proven: type of bool, True if the subproblem was solved to optimality
+        """
+
+        # fix the order of pairs where both operations are kept, start from the current schedule
+        order = (sch[self.I, self.K] < sch[self.J, self.K]).astype(int)
+        fixed = ~(free[self.I, self.K] | free[self.J, self.K])
+        self.m.setAttr('LB', self.ys, np.where(fixed, order, 0).tolist())
+        self.m.setAttr('UB', self.ys, np.where(fixed, order, 1).tolist())
+        self.m.setAttr('Start', self.xs, sch.ravel().tolist())
+        self.m.setAttr('Start', self.ys, order.tolist())
+        self.z.Start = obj
+
+        self.m.Params.TimeLimit = time_limit
+        self.m.optimize()
+        if not self.m.SolCount:
+            return None, False
+        new = np.rint(self.m.getAttr('X', self.xs)).astype(int).reshape(self.case.size)
+        return new, self.m.Status == gb.GRB.OPTIMAL
+
+
+class Z3Subproblem:
+    """
+    z3 model with order literals built once on an incremental solver, each neighborhood fixes the orders between
+    operations kept in place by assumptions and descends on the makespan until no better schedule exists
+    """
+
+    def __init__(self, case):
+        self.case = case
+        self.s = z3.Solver()
+        self.y = {}
+        self.x, self.obj, constraints = build_task_1_z3(case, self.y)
+        self.s.add(constraints)
+
+    def solve(self, sch, obj, free, time_limit):
+        """
+        :param sch: type of np.ndarray, current schedule (start time)
+        :param obj: type of int, makespan of the current schedule
+        :param free: type of np.ndarray, (n, m) True for operations to re-optimize
+        :param time_limit: type of float, time limit in second
+        :return: sch: type of np.ndarray, best schedule found, None if none
+                 proven: type of bool, True if no better schedule exists in the neighborhood
+        """
+
+        deadline = time.time() + time_limit
+        n, m = self.case.size
+
+        # kept operations keep their current order on each machine
+        fixed = [v if sch[i, k] < sch[j, k] else z3.Not(v)
+                 for (i, j, k), v in self.y.items() if not (free[i, k] or free[j, k])]
+
+        # descend on the makespan within the neighborhood
+        best, proven = None, False
+        while time.time() < deadline:
+            probe = z3.Bool(f'obj_le_{obj - 1}')
+            self.s.add(z3.Implies(probe, self.obj <= obj - 1))
+            self.s.set('timeout', max(1, int(1e3 * (deadline - time.time()))))
+            res = self.s.check(probe, *fixed)
+            if res != z3.sat:
+                proven = res == z3.unsat
+                break
+            model = self.s.model()
+            best = np.array([[model[self.x[i][k]].as_long() for k in range(m)] for i in range(n)])
+            obj = int((best + self.case.pt).max())
+
+        return best, proven
+
+
+def task_1_lns(case, time_limit, backend='gurobi', sub_time=5, frac=None, seed=0):
+    """
+    large neighborhood search for big test cases: start from the best dispatching rule schedule, repeatedly free
+    a neighborhood and re-optimize it with the gurobi or z3 model while all other operations keep their order
+    :param case: type of Test_case
+    :param time_limit: type of int, total time limit in min
+    :param backend: type of str, 'gurobi' or 'z3'
+    :param sub_time: type of float, time limit of each neighborhood in second
+    :param frac: type of float, initial fraction of operations to free, adapted during the search,
+                 None for about 50 operations
+    :param seed: type of int, seed for neighborhood selection
+    :return: None (in-place modification on case.obj and case.sch)
+    """
+
+    print(f'LNS ({backend}) starts solving {case.name}...\n')
+
+    # no solution fields of an earlier solver on the same case survive this one
+    case.opt, case.lb, case.trj = False, None, []
+
+    # compute execution time
+    start_time = time.time()
+    deadline = start_time + time_limit * 60
+    rng = np.random.default_rng(seed)
+    frac = min(0.3, 50 / case.pt.size) if frac is None else frac
+
+    # initial schedule from dispatching rules
+    if case.ws_obj is None:
+        best_dispatch(case)
+    sch, obj = case.ws_sch.copy(), case.ws_obj
+    lb = trivial_lower_bound(case)
+
+    # model built once, reused for every neighborhood
+    sub = {'gurobi': GurobiSubproblem, 'z3': Z3Subproblem}[backend](case)
+    bt = time.time() - start_time
+    trj = [(bt, obj, lb, None)]
+
+    it = 0
+    while obj > lb and time.time() < deadline:
+        it += 1
+        kind = NEIGHBORHOODS[rng.integers(len(NEIGHBORHOODS))]
+        free = neighborhood(case, sch, obj, kind, frac, rng)
+        new, proven = sub.solve(sch, obj, free, max(0, min(sub_time, deadline - time.time())))
+
+        # accept schedules that are not worse, so the search can move along plateaus
+        if new is not None:
+            new_obj = int((new + case.pt).max())
+            if new_obj <= obj:
+                if new_obj < obj:
+                    trj.append((time.time() - start_time, new_obj, lb, None))
+                    print(f'Iteration {it} ({kind}, {100 * frac:.0f}%): {obj} -> {new_obj}, '
+                          f'{trj[-1][0]:.2f} sec')
+                sch, obj = new, new_obj
+
+        # adapt the neighborhood size: grow when solved to optimality, shrink when it timed out
+        frac = min(0.9, frac * 1.1) if proven else max(0.02, frac * 0.8)
+
+    # execution time
+    et = time.time() - start_time
+
+    # in-place modify case
+    case.slv = f'LNS ({backend})'
+    case.time = f'{int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms'
+    case.bt, case.st, case.trj = bt, et - bt, trj
+    case.obj, case.sch, case.lb = obj, sch, lb
+    case.opt = obj == lb
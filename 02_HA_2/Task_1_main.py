@@ -1,7 +1,10 @@
 from Read_test_case import *
 from Task_1_helper_functions import *
+from Task_1_cp_engine import task_1_cp
+from Result_cache import cached_solver
 
 # numpy is needed in helper functions
+# see Task_1_portfolio.py to run several solver configurations in parallel processes instead
 
 # select test cases from folder "Test case", see details in Read_test_case.py
 case_name = ['tf06', 'tf10', 'la01', 'la02', 'la03', 'la04', 'la05']
@@ -11,11 +14,20 @@ test_case = read_test_case(case_name)
 
 # params
 time_limit = 20  # time limit for solver in min
+formulation = 'symmetric'  # gurobi formulation, 'original' or 'symmetric', see build_task_1_gurobi
+warm_start = True  # start both solvers from the best dispatching rule schedule, see Task_1_dispatch_rules.py
+z3_mode = 'bisection'  # z3 mode, 'optimize' for z3.Optimize, 'bisection' or 'descent' for incremental makespan probes
+tighten = True  # presolve time windows, fixed orders and makespan lower bound, see Task_1_presolve.py
+builder = 'loop'  # gurobi model builder, 'loop' for generator expressions or 'matrix' for the matrix API
+use_cache = True  # restore results of earlier runs with the same instance, solver and params, see Result_cache.py
 dtl_flag = False  # detail flag of Test_case, True for detailed info, False for solution only when printing
 
+# solvers, optionally cached
+solve_gurobi, solve_z3, solve_cp = (cached_solver(f) if use_cache else f for f in (task_1_gurobi, task_1_z3, task_1_cp))
+
 # solve using gurobi
 for case in test_case:
-    task_1_gurobi(case, time_limit)
+    solve_gurobi(case, time_limit, formulation, warm_start, tighten=tighten, builder=builder)
 # check solutions
 print('\n*******************************************'
       '\n********** Gurobi solution below **********'
@@ -26,7 +38,7 @@ for case in test_case:
 
 # solve using z3
 for case in test_case:
-    task_1_z3(case, time_limit)
+    solve_z3(case, time_limit, warm_start, z3_mode, tighten)
 # check solutions
 print('\n*******************************************'
       '\n************ Z3 solution below ************'
@@ -34,3 +46,14 @@ print('\n*******************************************'
 for case in test_case:
     case.dtl = dtl_flag
     print(case)
+
+# solve using the native constraint programming engine, no external solver needed
+for case in test_case:
+    solve_cp(case, time_limit, warm_start)
+# check solutions
+print('\n*******************************************'
+      '\n************ CP solution below ************'
+      '\n*******************************************\n')
+for case in test_case:
+    case.dtl = dtl_flag
+    print(case)
@@ -0,0 +1,146 @@
+import os
+import multiprocessing as mp
+import multiprocessing.connection
+from collections import deque
+from Read_test_case import *
+from Task_1_helper_functions import *
+from Task_1_lns import task_1_lns
+from Task_1_cp_engine import task_1_cp
+
+# solvers available to the portfolio, called as solver(case, time_limit, **kwargs)
+SOLVERS = {'gurobi': task_1_gurobi, 'z3': task_1_z3, 'cp': task_1_cp, 'lns': task_1_lns}
+
+# default portfolio: (solver name, keyword arguments)
+CONFIGS = [('gurobi', {'formulation': 'symmetric', 'warm_start': True}),
+           ('gurobi', {'formulation': 'symmetric', 'warm_start': True, 'params': {'MIPFocus': 1}}),
+           ('gurobi', {'formulation': 'symmetric', 'warm_start': True, 'tighten': True}),
+           ('gurobi', {'formulation': 'original', 'warm_start': True}),
+           ('z3', {'warm_start': True}),
+           ('cp', {'warm_start': True})]
+
+
+def _worker(case, time_limit, solver, kwargs, conn):
+    """
+    solve one case with one configuration in a child process and send it back
+    :param case: type of Test_case
+    :param time_limit: type of int, time limit for the solver in min
+    :param solver: type of str, key of SOLVERS
+    :param kwargs: type of dict, keyword arguments of the solver
+    :param conn: type of Connection, where (case or None, error message) is sent
+    :return: None
+    """
+
+    try:
+        SOLVERS[solver](case, time_limit, **kwargs)
+        case.cfg = {'solver': solver, **kwargs}
+        conn.send((case, None))
+    except Exception as e:
+        conn.send((None, f'{type(e).__name__}: {e}'))
+    conn.close()
+
+
+def _better(a, b):
+    """
+    :param a: type of Test_case or None
+    :param b: type of Test_case or None
+    :return: the one with the smaller objective, proven optimal first, cases without a solution last
+    """
+
+    def rank(case):
+        if case is None or not isinstance(case.obj, (int, np.integer)):
+            return 2, 0
+        return (0 if case.opt else 1), case.obj
+
+    return a if rank(a) <= rank(b) else b
+
+
+def solve_portfolio(cases, time_limit, configs=CONFIGS, workers=None):
+    """
+    solve every case with every configuration in parallel processes, stop the other configurations of a case
+    as soon as one proves optimality
+    :param cases: type of list, Test_case objects
+    :param time_limit: type of int, time limit for each solver run in min
+    :param configs: type of list, (solver name, keyword arguments) pairs, see SOLVERS
+    :param workers: type of int, maximum number of solver processes at a time, None for the number of cores
+    :return: best: type of list, best solved Test_case for each case, with the winning configuration in case.cfg
+    """
+
+    workers = workers or os.cpu_count()
+    ctx = mp.get_context('spawn')  # a fresh interpreter per solver, same behavior on every OS
+
+    pending = deque((c, k) for c in range(len(cases)) for k in range(len(configs)))
+    running = {}  # (case index, configuration index) -> (Process, Connection)
+    best = [None] * len(cases)
+    finished = set()  # cases proven optimal
+
+    while pending or running:
+        # fill the worker pool
+        while pending and len(running) < workers:
+            key = pending.popleft()
+            if key[0] in finished:
+                continue
+            solver, kwargs = configs[key[1]]
+            reader, writer = ctx.Pipe(duplex=False)
+            p = ctx.Process(target=_worker, args=(cases[key[0]], time_limit, solver, kwargs, writer))
+            p.start()
+            writer.close()
+            running[key] = (p, reader)
+        if not running:
+            break
+
+        # wait for results, a connection is also ready when its process exits without sending
+        ready = mp.connection.wait([reader for p, reader in running.values()])
+        for key in [k for k, (p, reader) in running.items() if reader in ready]:
+            if key not in running:  # stopped below by another configuration of the same case
+                continue
+            p, reader = running.pop(key)
+            try:
+                case, error = reader.recv()
+            except EOFError:
+                case, error = None, f'exited with code {p.exitcode} without a result'
+            reader.close()
+            p.join()
+            if error:
+                print(f'Configuration {configs[key[1]]} failed on {cases[key[0]].name}: {error}\n')
+                continue
+            best[key[0]] = _better(best[key[0]], case)
+
+            # proven optimal: stop the other configurations of this case
+            if case.opt:
+                finished.add(key[0])
+                for k in [k for k in running if k[0] == key[0]]:
+                    p, reader = running.pop(k)
+                    p.terminate()
+                    p.join()
+                    reader.close()
+                print(f'{case.name} solved to optimality by {case.cfg}\n')
+
+    return best
+
+
+def main():
+    # select test cases from folder "Test case", see details in Read_test_case.py
+    case_name = ['tf06', 'tf10', 'la01', 'la02', 'la03', 'la04', 'la05']
+    test_case = read_test_case(case_name)
+
+    # params
+    time_limit = 20  # time limit for each solver run in min
+    workers = None  # number of solver processes at a time, None for the number of cores
+
+    # solve using the portfolio
+    best = solve_portfolio(test_case, time_limit, CONFIGS, workers)
+
+    # check solutions
+    print('\n*******************************************'
+          '\n******** Portfolio solution below *********'
+          '\n*******************************************\n')
+    for case, each in zip(best, test_case):
+        if case is None:
+            print(f'Case name: {each.name}\nNo configuration returned a solution\n')
+        else:
+            print(case)
+            print(f'Configuration: {case.cfg}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import time
+import heapq
+import numpy as np
+
+
+def horizon(case):
+    """
+    makespan of a feasible schedule, used as a valid big-M and upper bound on start times
+    :param case: type of Test_case
+    :return: H: type of int, makespan of a schedule dispatching operations level by level in processing order,
+                or of the warm start schedule if that is shorter
+    """
+
+    job_ready, machine_ready = np.zeros(case.size[0], dtype=int), np.zeros(case.size[1], dtype=int)
+    for j in range(case.size[1]):
+        for i in range(case.size[0]):
+            mc = case.po[i, j]
+            job_ready[i] = machine_ready[mc] = max(job_ready[i], machine_ready[mc]) + case.pt[i, mc]
+
+    H = int(job_ready.max())
+    if case.ws_obj is not None:
+        H = min(H, case.ws_obj)
+
+    return H
+
+
+def trivial_lower_bound(case):
+    """
+    :param case: type of Test_case
+    :return: type of int, the larger of the longest job and the most loaded machine
+    """
+
+    return int(max(case.pt.sum(axis=1).max(), case.pt.sum(axis=0).max()))
+
+
+def heads_tails(case, before):
+    """
+    longest paths through job precedences and fixed machine orders
+    :param case: type of Test_case
+    :param before: type of tuple, (a_job, b_job, machine) arrays of fixed orders, job a before job b on the machine
+    :return: r: type of np.ndarray, (n, m) head (earliest start) of job i on machine j
+             q: type of np.ndarray, (n, m) tail (work that must follow the end) of job i on machine j
+    """
+
+    n, m = case.size
+    rows = np.arange(n)
+    pt, po = case.pt, case.po
+    a, b, k = before
+    r, q = np.zeros((n, m), dtype=int), np.zeros((n, m), dtype=int)
+
+    # fixed orders form a DAG together with the job chains, iterate until no head or tail moves
+    while True:
+        r_old, q_old = r.copy(), q.copy()
+        # 1. job precedences
+        for j in range(1, m):
+            r[rows, po[:, j]] = np.maximum(r[rows, po[:, j]], r[rows, po[:, j - 1]] + pt[rows, po[:, j - 1]])
+        for j in range(m - 2, -1, -1):
+            q[rows, po[:, j]] = np.maximum(q[rows, po[:, j]], q[rows, po[:, j + 1]] + pt[rows, po[:, j + 1]])
+        # 2. fixed machine orders
+        np.maximum.at(r, (b, k), r[a, k] + pt[a, k])
+        np.maximum.at(q, (a, k), q[b, k] + pt[b, k])
+        if (r == r_old).all() and (q == q_old).all():
+            return r, q
+
+
+def jackson_bound(r, p, q):
+    """
+    makespan of the preemptive one-machine schedule that always runs the released job with the largest tail,
+    which is optimal for the preemptive relaxation and thus a lower bound on the makespan
+    :param r: type of np.ndarray, heads of the jobs on the machine
+    :param p: type of np.ndarray, processing times of the jobs on the machine
+    :param q: type of np.ndarray, tails of the jobs on the machine
+    :return: type of int, lower bound on the makespan
+    """
+
+    jobs = sorted(range(len(r)), key=lambda i: r[i])
+    rem = [int(v) for v in p]
+    ready = []  # (-tail, job)
+    t, c, nxt = 0, 0, 0
+    while nxt < len(jobs) or ready:
+        if not ready:
+            t = max(t, int(r[jobs[nxt]]))
+        while nxt < len(jobs) and r[jobs[nxt]] <= t:
+            heapq.heappush(ready, (-int(q[jobs[nxt]]), jobs[nxt]))
+            nxt += 1
+        # run the job with the largest tail until it ends or the next job is released
+        i = ready[0][1]
+        run = rem[i] if nxt == len(jobs) else min(rem[i], int(r[jobs[nxt]]) - t)
+        t, rem[i] = t + run, rem[i] - run
+        if rem[i] == 0:
+            heapq.heappop(ready)
+            c = max(c, t + int(q[i]))
+
+    return c
+
+
+def presolve(case, ub=None):
+    """
+    tighten a single test case before solving: heads and tails from job precedences, one-machine preemptive
+    (Jackson) lower bounds, and machine orders implied by the time windows under the makespan upper bound
+    (job j cannot precede job i if r_j + p_j + p_i + q_i > ub), repeated until nothing changes
+    :param case: type of Test_case
+    :param ub: type of int, makespan upper bound, None for horizon(case), schedules with makespan ub are kept
+    :return: est: type of np.ndarray, (n, m) earliest start time of job i on machine j
+             lst: type of np.ndarray, (n, m) latest start time of job i on machine j
+             order: type of dict, fixed orders (i, j, m) -> True if job i before job j on machine m, for i < j
+             lb: type of int, makespan lower bound
+             ub: type of int, makespan upper bound
+    """
+
+    start_time = time.time()
+    n, m = case.size
+    pt = case.pt
+    ub = horizon(case) if ub is None else ub
+
+    # every pair i < j on every machine, state 1: i before j, -1: j before i, 0: open
+    I, J = np.triu_indices(n, 1)
+    I, J, K = np.tile(I, m), np.tile(J, m), np.repeat(np.arange(m), len(I))
+    state = np.zeros(len(I), dtype=int)
+
+    lb = trivial_lower_bound(case)
+    while True:
+        # heads and tails under the orders fixed so far
+        fix_i, fix_j = state == 1, state == -1
+        before = (np.concatenate([I[fix_i], J[fix_j]]),
+                  np.concatenate([J[fix_i], I[fix_j]]),
+                  np.concatenate([K[fix_i], K[fix_j]]))
+        r, q = heads_tails(case, before)
+
+        # lower bounds: longest path through each operation, Jackson preemptive bound of each machine
+        lb = max(lb, int((r + pt + q).max()), *(jackson_bound(r[:, k], pt[:, k], q[:, k]) for k in range(m)))
+        if lb > ub:
+            raise ValueError(f'No schedule of {case.name} with makespan <= {ub}')
+
+        # orders implied by the time windows
+        j_first = r[J, K] + pt[J, K] + pt[I, K] + q[I, K] <= ub  # job j may precede job i
+        i_first = r[I, K] + pt[I, K] + pt[J, K] + q[J, K] <= ub  # job i may precede job j
+        if (state == 0)[~j_first & ~i_first].any():
+            raise ValueError(f'No schedule of {case.name} with makespan <= {ub}')
+        new = np.where((state == 0) & ~j_first, 1, np.where((state == 0) & ~i_first, -1, state))
+        if (new == state).all():
+            break
+        state = new
+
+    est, lst = r, ub - q - pt
+    order = {(i, j, k): bool(s == 1) for i, j, k, s in zip(I.tolist(), J.tolist(), K.tolist(), state) if s}
+
+    et = time.time() - start_time
+    print(f'Presolve {case.name}: lb = {lb}, ub = {ub}, {len(order)} of {len(state)} orders fixed, '
+          f'mean window {(lst - est).mean():.1f} ({int(1e3 * et)} ms)\n')
+
+    return est, lst, order, lb, ub
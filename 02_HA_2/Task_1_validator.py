@@ -0,0 +1,88 @@
+import numpy as np
+
+
+def transport_matrix(tt_map, m):
+    """
+    convert tt_map of task_2_gurobi into a matrix
+    :param tt_map: type of dict, transportation time in second, 0~m-1: machines, m: delivery, -1: warehouse
+    :param m: type of int, number of machines
+    :return: tt: type of np.ndarray, (m + 2, m + 2) transportation time, 0: warehouse, 1~m: machines, m + 1: delivery
+    """
+
+    tt = np.zeros((m + 2, m + 2))
+    for (a, b), v in tt_map.items():
+        tt[a + 1, b + 1] = v
+    return tt
+
+
+def evaluate_schedules(pt, po, sch, tt_map=None, eps=1e-6):
+    """
+    check and score a stack of schedules in one vectorized pass
+    :param pt: type of np.ndarray, (n, m) processing time p_ij in second
+    :param po: type of np.ndarray, (n, m) processing order of each job
+    :param sch: type of np.ndarray, (k, n, m) or (n, m) start time of job i on machine j in second
+    :param tt_map: type of dict, transportation time as in task_2_gurobi, None for task 1 without transportation
+    :param eps: type of float, tolerance for schedules in floating point
+    :return: makespan: type of np.ndarray, (k,) makespan of each schedule (including delivery with tt_map)
+             feasible: type of np.ndarray, (k,) True if the schedule violates nothing
+             precedence: type of np.ndarray, (k, n, m) True where an operation starts before its job predecessor
+                         (or the transport from it, or from the warehouse for the first operation) is done
+             overlap: type of np.ndarray, (k, n, m) True where an operation starts before its machine is free
+    """
+
+    sch = np.asarray(sch)
+    single = sch.ndim == 2
+    sch = sch[None] if single else sch
+    k, (n, m) = sch.shape[0], pt.shape
+    rows = np.arange(n)[:, None]
+
+    # transportation time between consecutive operations of each job, from the warehouse and to delivery
+    if tt_map is None:
+        tt_prev, tt_last = np.zeros((n, m)), np.zeros(n)
+    else:
+        tt = transport_matrix(tt_map, m)
+        tt_prev = tt[np.hstack([np.zeros((n, 1), dtype=int), po[:, :-1] + 1]), po + 1]
+        tt_last = tt[po[:, -1] + 1, m + 1]
+
+    # 1. precedence, in processing order: start >= end of the previous operation + transport
+    start = sch[:, rows, po]  # (k, n, m) in processing order
+    end = start + pt[rows, po]
+    ready = np.concatenate([np.zeros((k, n, 1)), end[:, :, :-1]], axis=2) + tt_prev
+    precedence = np.zeros((k, n, m), dtype=bool)
+    precedence[:, rows, po] = (start < ready - eps) | (start < -eps)
+
+    # 2. machine non-overlap: sort operations on each machine by start time, operations without processing
+    # time first among equal starts, no operation may start before every earlier operation has ended, so
+    # as in the disjunctions of the models an operation without processing time is not inside another one
+    zero_first = np.broadcast_to(np.argsort(pt > 0, axis=0, kind='stable'), (k, n, m))
+    order = np.take_along_axis(zero_first, np.argsort(np.take_along_axis(sch, zero_first, axis=1), axis=1,
+                                                      kind='stable'), axis=1)  # (k, n, m) job order on each machine
+    s_sorted = np.take_along_axis(sch, order, axis=1)
+    p_sorted = pt[order, np.arange(m)]
+    busy = np.maximum.accumulate(s_sorted + p_sorted, axis=1)
+    clash = np.zeros((k, n, m), dtype=bool)
+    clash[:, 1:] = s_sorted[:, 1:] < busy[:, :-1] - eps
+    overlap = np.zeros((k, n, m), dtype=bool)
+    np.put_along_axis(overlap, order, clash, axis=1)
+
+    # makespan and feasibility
+    makespan = (end[:, :, -1] + tt_last).max(axis=1)
+    feasible = ~(precedence.any(axis=(1, 2)) | overlap.any(axis=(1, 2)))
+
+    if single:
+        return makespan[0], feasible[0], precedence[0], overlap[0]
+    return makespan, feasible, precedence, overlap
+
+
+def validate_case(case, tt_map=None):
+    """
+    independent check of the solution of a solved test case
+    :param case: type of Test_case
+    :param tt_map: type of dict, transportation time as in task_2_gurobi, None for task 1
+    :return: type of bool, True if case.sch is feasible and its makespan is within case.obj
+    """
+
+    if not isinstance(case.sch, np.ndarray):
+        return False
+    makespan, feasible, precedence, overlap = evaluate_schedules(case.pt, case.po, case.sch, tt_map)
+    return bool(feasible) and makespan <= case.obj + 1e-6 * max(1, abs(case.obj))
@@ -1,5 +1,8 @@
+import time
 from gurobipy import *
 import numpy as np
+from Task_1_helper_functions import trajectory_callback, measure_build, print_builder_report
+from Task_1_validator import transport_matrix
 
 
 def task_2_a_star(dist_map, h, source, sink):
@@ -51,23 +54,20 @@ def task_2_a_star(dist_map, h, source, sink):
     dist_map[source, sink] = dist_map[sink, source] = sp
 
 
-def task_2_gurobi(case, time_limit, tt_map):
+def build_task_2_gurobi(case, tt_map):
     """
-    solver for a single test case in a variable size using gurobi
+    build the model of a single test case with transportation using gurobi
     :param case: type of Test_case
-    :param time_limit: type of int, time limit for the solver in min
     :param tt_map: shortest transportation time in second, 0~5: machines, 6: delivery, -1: warehouse
-    :return: None (in-place modification on case.obj and case.sch)
+    :return: m: type of gurobi Model
+             x: type of tupledict, start time
+             y: type of tupledict, mutual exclusion
+             z: type of Var, total execution time
     """
 
-    print(f'Gurobi starts solving {case.name}...\n')
-
     # model for task 2 using gurobi
     m = Model('task_2_gurobi')
 
-    # set time limit in sec
-    m.Params.TimeLimit = int(time_limit * 60)
-
     # decision variable
     x = m.addVars(case.size[0], case.size[1], vtype=GRB.CONTINUOUS, name='start time')
     y = m.addVars(case.size[0], case.size[0], case.size[1], vtype=GRB.BINARY,
@@ -90,7 +90,7 @@ def task_2_gurobi(case, time_limit, tt_map):
                  for i in range(case.size[0]))
     # 4. mutual exclusion for each machine: x_i ends before x_j starts -> y = 0
     m.addConstrs(x[i, m] + case.pt[i, m] <= x[j, m] + M * y[i, j, m]
-                 for m in range(1, case.size[1])
+                 for m in range(case.size[1])
                  for i in range(case.size[0] - 1)
                  for j in range(i + 1, case.size[0]))
     # 5. mutual exclusion for each machine: x_i starts after x_j ends -> y = 1
@@ -102,13 +102,121 @@ def task_2_gurobi(case, time_limit, tt_map):
     # objective: minimize total execution time
     m.setObjective(z, GRB.MINIMIZE)
 
-    # solve
-    m.optimize()
+    return m, x, y, z
+
+
+def build_task_2_gurobi_matrix(case, tt_map):
+    """
+    build the same model as build_task_2_gurobi from the pt/po arrays with the gurobi matrix API
+    :param case: type of Test_case
+    :param tt_map: shortest transportation time in second, 0~5: machines, 6: delivery, -1: warehouse
+    :return: m: type of gurobi Model
+             x: type of tupledict, start time
+             y: type of tupledict, mutual exclusion
+             z: type of Var, total execution time
+    """
+
+    n, mc = case.size
+    pt, po = case.pt, case.po
+    rows = np.arange(n)
+    # transportation time, 0: warehouse, 1~m: machines, m + 1: delivery
+    tt = transport_matrix(tt_map, mc)
+
+    # model for task 2 using gurobi
+    m = Model('task_2_gurobi')
+
+    # decision variable
+    x = m.addMVar((n, mc), vtype=GRB.CONTINUOUS, name='start time')
+    y = m.addMVar((n, n, mc), vtype=GRB.BINARY, name='mutual exclusion for each pair of jobs on each machine')
+    z = m.addVar(vtype=GRB.INTEGER, name='total execution time')
+
+    # every pair i < j on each machine, in the order of build_task_2_gurobi
+    I, J = np.triu_indices(n, 1)
+    I, J, K = np.tile(I, mc), np.tile(J, mc), np.repeat(np.arange(mc), len(I))
+
+    # big-M
+    M = (pt.max() + max(tt_map.values())) * n * mc
+
+    # constraints
+    # 1. for each job: start time >= transportation time from warehouse to the first machine
+    m.addConstr(x[rows, po[:, 0]] >= tt[0, po[:, 0] + 1])
+    # 2. for each job: start time + processing time + transportation time <= next start time
+    a, b = po[:, :-1], po[:, 1:]
+    m.addConstr(x[rows[:, None], a] + pt[rows[:, None], a] + tt[a + 1, b + 1] <= x[rows[:, None], b])
+    # 3. for each job: the last start time + processing time + transportation time to delivery <= total execution time
+    m.addConstr(x[rows, po[:, -1]] + pt[rows, po[:, -1]] + tt[po[:, -1] + 1, mc + 1] <= z)
+    # 4. mutual exclusion for each machine: x_i ends before x_j starts -> y = 0
+    m.addConstr(x[I, K] + pt[I, K] <= x[J, K] + M * y[I, J, K])
+    # 5. mutual exclusion for each machine: x_i starts after x_j ends -> y = 1
+    m.addConstr(x[I, K] >= x[J, K] + pt[J, K] - M * (1 - y[I, J, K]))
+
+    # objective: minimize total execution time
+    m.setObjective(z, GRB.MINIMIZE)
+    m.update()
+
+    # variables keyed as in build_task_2_gurobi
+    x = tupledict(zip(zip(*np.indices(case.size).reshape(2, -1).tolist()), x.reshape(-1).tolist()))
+    y = tupledict(zip(zip(*np.indices((n, n, mc)).reshape(3, -1).tolist()), y.reshape(-1).tolist()))
+
+    return m, x, y, z
+
+
+def task_2_compare_builders(cases, tt_map):
+    """
+    compare build time and peak python memory of build_task_2_gurobi and build_task_2_gurobi_matrix
+    :param cases: type of list, Test_case objects
+    :param tt_map: shortest transportation time in second, 0~5: machines, 6: delivery, -1: warehouse
+    :return: report: type of list, one dict per case and builder
+    """
+
+    report = []
+    for case in cases:
+        for name, builder in (('loop', build_task_2_gurobi), ('matrix', build_task_2_gurobi_matrix)):
+            report.append({'case': case.name, 'builder': name, **measure_build(builder, case, tt_map)})
+
+    print_builder_report(report)
+    return report
+
+
+def task_2_gurobi(case, time_limit, tt_map, builder='loop'):
+    """
+    solver for a single test case in a variable size using gurobi
+    :param case: type of Test_case
+    :param time_limit: type of int, time limit for the solver in min
+    :param tt_map: shortest transportation time in second, 0~5: machines, 6: delivery, -1: warehouse
+    :param builder: type of str, 'loop' for build_task_2_gurobi, 'matrix' for build_task_2_gurobi_matrix
+    :return: None (in-place modification on case.obj and case.sch)
+    """
+
+    print(f'Gurobi starts solving {case.name}...\n')
+
+    # compute execution time
+    start_time = time.time()
+
+    # model for task 2 using gurobi
+    build = {'loop': build_task_2_gurobi, 'matrix': build_task_2_gurobi_matrix}[builder]
+    m, x, y, z = build(case, tt_map)
+
+    # set time limit in sec
+    m.Params.TimeLimit = int(time_limit * 60)
+    bt = time.time() - start_time
+
+    # solve, recording the trajectory
+    trj = []
+    m.optimize(trajectory_callback(trj, bt))
+
+    # execution time
+    et = time.time() - start_time
 
     # in-place modify case
     case.slv = 'Gurobi'
+    case.opt = m.Status == GRB.OPTIMAL
+    case.time = f'{int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms'
+    case.bt, case.st, case.trj = bt, et - bt, trj
     try:
         case.obj = z.X
+        case.lb = m.ObjBound
+        case.trj.append((et, case.obj, case.lb, int(m.NodeCount)))
     except:
         case.obj = f'No solution found within {time_limit} min'
     try:
@@ -0,0 +1,210 @@
+import os
+import time
+import multiprocessing as mp
+from Read_test_case import *
+from Task_2_helper_functions import *
+from Task_1_validator import transport_matrix
+from Shop_floor import X_DIST, Y_DIST, SPD, ShopFloor
+
+
+def scenario_tt_map(scenario):
+    """
+    :param scenario: type of dict, shop floor variant, any of 'x_dist', 'y_dist', 'spd', missing ones take the
+                     defaults of Shop_floor.py
+    :return: tt_map: type of dict, shortest transportation time in second, 0~5: machines, 6: delivery, -1: warehouse
+    """
+
+    floor = ShopFloor(scenario.get('x_dist', X_DIST), scenario.get('y_dist', Y_DIST))
+    return floor.tt_map(scenario.get('spd', SPD))
+
+
+class TransportModel:
+    """
+    model of build_task_2_gurobi kept alive across shop floor variants: transportation times only enter the
+    right-hand sides of constraints 1~3 and the big-M of constraints 4~5, so a new variant changes those
+    coefficients in place instead of building the model again
+    """
+
+    def __init__(self, case, tt_map):
+        """
+        :param case: type of Test_case
+        :param tt_map: type of dict, transportation times of the first variant
+        """
+
+        n, mc = case.size
+        self.case = case
+        self.m, self.x, self.y, self.z = build_task_2_gurobi(case, tt_map)
+        self.m.Params.OutputFlag = 0
+        self.m.update()
+
+        # constraint handles in the order of build_task_2_gurobi
+        cons = self.m.getConstrs()
+        p = n * (n - 1) // 2 * mc
+        self.first, self.chain = cons[:n], cons[n:n * mc]
+        self.last, self.before, self.after = cons[n * mc:n * mc + n], cons[n * mc + n:n * mc + n + p], cons[-p:]
+        self.y_pairs = [self.y[i, j, k] for k in range(mc) for i in range(n - 1) for j in range(i + 1, n)]
+        self.pt_j = [int(case.pt[j, k]) for k in range(mc) for i in range(n - 1) for j in range(i + 1, n)]
+
+        self.rhs, self.M = self.coefficients(tt_map)
+
+    def coefficients(self, tt_map):
+        """
+        :param tt_map: type of dict, transportation times
+        :return: rhs: type of np.ndarray, right-hand sides of constraints 1~3 in the order of the model
+                 M: type of float, big-M of constraints 4~5
+        """
+
+        n, mc = self.case.size
+        pt, po = self.case.pt, self.case.po
+        rows = np.arange(n)
+        tt = transport_matrix(tt_map, mc)  # 0: warehouse, 1~m: machines, m + 1: delivery
+
+        first = tt[0, po[:, 0] + 1]
+        chain = -(pt[rows[:, None], po[:, :-1]] + tt[po[:, :-1] + 1, po[:, 1:] + 1])
+        last = -(pt[rows, po[:, -1]] + tt[po[:, -1] + 1, mc + 1])
+        M = (pt.max() + max(tt_map.values())) * n * mc
+
+        return np.concatenate([first, chain.ravel(), last]), M
+
+    def update(self, tt_map):
+        """
+        move the model to another variant, touching only the coefficients whose value changes
+        :param tt_map: type of dict, transportation times
+        :return: type of int, number of changed coefficients
+        """
+
+        rhs, M = self.coefficients(tt_map)
+        changed = np.flatnonzero(rhs != self.rhs)
+        cons = self.first + self.chain + self.last
+        self.m.setAttr('RHS', [cons[c] for c in changed], rhs[changed].tolist())
+        num = len(changed)
+
+        if M != self.M:
+            # 4. x_i - x_j - M * y <= -p_i, 5. x_i - x_j - M * y >= p_j - M
+            for c4, c5, y, p in zip(self.before, self.after, self.y_pairs, self.pt_j):
+                self.m.chgCoeff(c4, y, -M)
+                self.m.chgCoeff(c5, y, -M)
+                c5.RHS = p - M
+            num += 3 * len(self.before)
+
+        self.rhs, self.M = rhs, M
+        return num
+
+    def solve(self, time_limit, warm_start=True):
+        """
+        :param time_limit: type of int, time limit for the solver in min
+        :param warm_start: type of bool, True to start from the machine orders of the previous solution, gurobi
+                           completes the start times for the new transportation times
+        :return: type of dict, makespan, lower bound, optimality and solving time
+        """
+
+        if warm_start and self.m.SolCount:
+            orders = self.m.getAttr('X', self.y_pairs)
+            self.m.setAttr('Start', self.m.getVars(), [GRB.UNDEFINED] * self.m.NumVars)
+            self.m.setAttr('Start', self.y_pairs, [round(v) for v in orders])
+        self.m.Params.TimeLimit = int(time_limit * 60)
+
+        start_time = time.time()
+        self.m.optimize()
+        et = time.time() - start_time
+
+        solved = self.m.SolCount > 0
+        return {'obj': self.z.X if solved else None, 'lb': self.m.ObjBound if solved else None,
+                'opt': self.m.Status == GRB.OPTIMAL, 'time': et}
+
+
+def _run_chunk(case, scenarios, time_limit, warm_start):
+    """
+    solve a chunk of variants one after another on one reused model
+    :param case: type of Test_case
+    :param scenarios: type of list, shop floor variants, see scenario_tt_map
+    :param time_limit: type of int, time limit for each variant in min
+    :param warm_start: type of bool, True to start each variant from the solution of the previous one
+    :return: rows: type of list, one dict per variant
+    """
+
+    rows, model = [], None
+    for scenario in scenarios:
+        start_time = time.time()
+        tt_map = scenario_tt_map(scenario)
+        if model is None:
+            model = TransportModel(case, tt_map)
+            changed = model.m.NumConstrs
+        else:
+            changed = model.update(tt_map)
+        ut = time.time() - start_time
+        rows.append({'name': scenario.get('name', str(len(rows))), 'changed': changed, 'update': ut,
+                     **model.solve(time_limit, warm_start)})
+
+    return rows
+
+
+def scenario_sweep(case, scenarios, time_limit, workers=None, warm_start=True):
+    """
+    what-if evaluation of shop floor layouts and transportation speeds for a single test case: the variants
+    are split into consecutive chunks, each solved in its own process on one model updated from variant to
+    variant, so similar neighbouring variants profit from the coefficient updates and warm starts
+    :param case: type of Test_case
+    :param scenarios: type of list, shop floor variants as dicts with 'name' and any of 'x_dist', 'y_dist', 'spd'
+    :param time_limit: type of int, time limit for each variant in min
+    :param workers: type of int, number of processes, None for the number of cores, 1 to solve in this process
+    :param warm_start: type of bool, True to start each variant from the solution of the previous one
+    :return: rows: type of list, one dict per variant in the order of scenarios
+    """
+
+    print(f'Gurobi starts sweeping {len(scenarios)} shop floor variants of {case.name}...\n')
+
+    workers = min(workers or os.cpu_count(), len(scenarios))
+    size = -(-len(scenarios) // workers)
+    chunks = [scenarios[c:c + size] for c in range(0, len(scenarios), size)]
+    if len(chunks) == 1:
+        return _run_chunk(case, scenarios, time_limit, warm_start)
+
+    with mp.get_context('spawn').Pool(len(chunks)) as pool:
+        results = pool.starmap(_run_chunk, [(case, chunk, time_limit, warm_start) for chunk in chunks])
+    return [row for rows in results for row in rows]
+
+
+def print_scenario_table(case, rows):
+    """
+    :param case: type of Test_case
+    :param rows: type of list, result of scenario_sweep
+    :return: None
+    """
+
+    base = rows[0]['obj']
+    print(f'Case name: {case.name}')
+    print(f'{"Variant":<20}{"Makespan":>10}{"vs first":>10}{"Bound":>10}{"Optimal":>9}{"Changed":>9}'
+          f'{"Update":>10}{"Solve":>10}')
+    for r in rows:
+        obj = f'{r["obj"]:.1f}' if r['obj'] is not None else '-'
+        delta = f'{r["obj"] - base:+.1f}' if r['obj'] is not None and base is not None else '-'
+        lb = f'{r["lb"]:.1f}' if r['lb'] is not None else '-'
+        print(f'{r["name"]:<20}{obj:>10}{delta:>10}{lb:>10}{str(r["opt"]):>9}{r["changed"]:>9}'
+              f'{1e3 * r["update"]:>8.1f}ms{r["time"]:>9.2f}s')
+    print()
+
+
+def main():
+    # select test cases from folder "Test case", see details in Read_test_case.py
+    case_name = ['tf06']
+    test_case = read_test_case(case_name)
+
+    # params
+    time_limit = 5  # time limit for each variant in min
+    workers = 2  # number of processes, None for the number of cores
+    warm_start = True  # start each variant from the solution of the previous one
+
+    # shop floor variants: transportation speeds, then widened and narrowed aisles
+    scenarios = [{'name': f'spd {spd} m/s', 'spd': spd} for spd in (5, 4, 3, 2)]
+    scenarios += [{'name': f'x_dist[{k}] {d:+} m', 'x_dist': [v + d * (i == k) for i, v in enumerate(X_DIST)]}
+                  for k in (1, 5) for d in (-5, 10)]
+    scenarios += [{'name': f'y_dist {d:+} m', 'y_dist': [v + d for v in Y_DIST]} for d in (-5, 5)]
+
+    for case in test_case:
+        rows = scenario_sweep(case, scenarios, time_limit, workers, warm_start)
+        print_scenario_table(case, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import time
+import numpy as np
+from Task_3_helper_functions import *
+
+# k shortest paths solvers, called as solver(dist_map, source, sink, path_num, time_limit)
+SOLVERS = {'yen': lambda dist_map, source, sink, path_num, time_limit: task_3_yen(dist_map, source, sink, path_num),
+           'gurobi-pool': task_3_gurobi_pool,
+           'z3-loop': task_3_exhaustive_dijkstra}
+
+
+def random_graph(num, degree=4, seed=0):
+    """
+    random shop-floor-like graph: nodes on a 100 m x 100 m floor, each linked to its nearest neighbours and the
+    next node so that the graph is connected, edge length is the rectilinear distance along the aisles
+    :param num: type of int, number of nodes
+    :param degree: type of int, number of nearest neighbours linked to each node
+    :param seed: type of int, random seed
+    :return: dist_map: type of dict, distance from node i to node j for i < j
+    """
+
+    rng = np.random.default_rng(seed)
+    pos = rng.integers(0, 100, (num, 2))
+    dist = np.abs(pos[:, None, :] - pos[None, :, :]).sum(axis=2) + 1
+
+    dist_map = {}
+    for i in range(num):
+        for j in [*np.argsort(dist[i])[1:degree + 1].tolist(), (i + 1) % num]:
+            dist_map[min(i, j), max(i, j)] = int(dist[i, j])
+
+    return dist_map
+
+
+def run_benchmark(sizes, path_nums, solvers=SOLVERS, time_limit=5, seed=0):
+    """
+    find the k shortest paths from node 0 to the last node of random graphs with every solver
+    :param sizes: type of list, numbers of nodes
+    :param path_nums: type of list, numbers of paths to be found
+    :param solvers: type of dict, solver by label
+    :param time_limit: type of int, time limit for each solver run in min
+    :param seed: type of int, random seed of the graphs
+    :return: results: type of list, one dict per graph size, number of paths and solver
+    """
+
+    results = []
+    for num in sizes:
+        dist_map = random_graph(num, seed=seed)
+        for path_num in path_nums:
+            ref = None
+            for label, solver in solvers.items():
+                start_time = time.time()
+                all_path = solver(dist_map, 0, num - 1, path_num, time_limit)
+                et = time.time() - start_time
+
+                # path values of the first solver as reference
+                values = [all_path[i][0] for i in sorted(all_path)]
+                ref = values if ref is None else ref
+                results.append({'nodes': num, 'edges': len(dist_map), 'k': path_num, 'solver': label,
+                                'found': len(values), 'match': values == ref, 'time': et})
+
+    return results
+
+
+def main():
+    # params
+    sizes = [8, 16, 24, 40]  # numbers of nodes
+    path_nums = [5, 20, 50]  # numbers of paths to be found
+    time_limit = 5  # time limit for each solver run in min
+
+    results = run_benchmark(sizes, path_nums, SOLVERS, time_limit)
+
+    # check results
+    print('\n*******************************************'
+          '\n********* Benchmark results below *********'
+          '\n*******************************************\n')
+    print(f'{"Nodes":>6}{"Edges":>7}{"k":>5}  {"Solver":<14}{"Found":>6}{"Match":>7}{"Time":>10}')
+    for r in results:
+        print(f'{r["nodes"]:>6}{r["edges"]:>7}{r["k"]:>5}  {r["solver"]:<14}{r["found"]:>6}{str(r["match"]):>7}'
+              f'{r["time"]:>9.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,18 @@
+import time
+from itertools import islice
 from z3 import *
+from Shortest_paths import adjacency_matrix, k_shortest_paths
+
+
+def format_path(obj, node_ord):
+    """
+    :param obj: type of int or float, path value
+    :param node_ord: type of list, visited nodes in order
+    :return: type of tuple, entry of all_path as (objective string, path string)
+    """
+
+    obj = int(obj) if float(obj).is_integer() else obj
+    return f'Objective: {obj}', 'Path: ' + ' -> '.join(str(each) for each in node_ord)
 
 
 def task_3_exhaustive_dijkstra(dist_map, source, sink, path_num, time_limit):
@@ -14,7 +28,7 @@ def task_3_exhaustive_dijkstra(dist_map, source, sink, path_num, time_limit):
     print(f'Z3 starts solving...\n')
 
     # params
-    num = 8  # number of nodes
+    num = max(max(k) for k in dist_map) + 1  # number of nodes
 
     # node list excluding source node and sink node
     nodes = [i for i in range(num)]
@@ -84,11 +98,133 @@ def task_3_exhaustive_dijkstra(dist_map, source, sink, path_num, time_limit):
         node_ord.append(sink)
 
         # save this path
-        node_ord_str = 'Path: '
-        for each in node_ord:
-            node_ord_str += str(each) + ' -> '
-        all_path[path_ord] = (f'Objective: {obj}', node_ord_str[:-4])
+        all_path[path_ord] = format_path(obj, node_ord)
 
         path_ord += 1
 
     return all_path
+
+
+def task_3_yen(dist_map, source, sink, path_num):
+    """
+    k shortest simple paths with Yen's algorithm, see k_shortest_paths in Shortest_paths.py
+    :param dist_map: type of dict, initial distances every pair of nodes, 1~6: machines, 0: warehouse, 7: delivery
+    :param source: type of int, source node
+    :param sink: type of int, sink node
+    :param path_num: type of int, number of paths to be found
+    :return: all_path: all found paths between source and sink containing path value and visited nodes in order,
+             in the format of task_3_exhaustive_dijkstra
+    """
+
+    print(f'Yen starts solving...\n')
+
+    # compute execution time
+    start_time = time.time()
+
+    paths = k_shortest_paths(adjacency_matrix(dist_map), source, sink)
+    all_path = {path_ord: format_path(obj, node_ord)
+                for path_ord, (obj, node_ord) in enumerate(islice(paths, path_num), 1)}
+
+    # execution time
+    et = time.time() - start_time
+    print(f'{len(all_path)} paths found in {int(et / 60)} min {int(et % 60)} sec {int(1e3 * et % 1e3)} ms\n')
+
+    return all_path
+
+
+def subtour_callback(x, source):
+    """
+    gurobi callback for lazy subtour elimination: arcs of a new incumbent not on the path from source form
+    cycles, each cycle S gets the cut sum(x[i, j] for i, j in S) <= |S| - 1
+    :param x: type of tupledict, arc variables (i, j)
+    :param source: type of int, source node
+    :return: callback: type of function, to be passed to Model.optimize
+    """
+
+    import gurobipy as gb  # only the gurobi pool needs gurobi, the other task 3 solvers run on z3 alone
+
+    def callback(model, where):
+        if where != gb.GRB.Callback.MIPSOL:
+            return
+        val = model.cbGetSolution(x)
+        succ = {i: j for (i, j), v in val.items() if v > 0.5}
+
+        # drop the path from source, what is left are cycles
+        tar = source
+        while tar in succ:
+            tar = succ.pop(tar)
+        while succ:
+            cycle, tar = [], next(iter(succ))
+            while tar in succ:
+                cycle.append(tar)
+                tar = succ.pop(tar)
+            model.cbLazy(gb.quicksum(x[i, j] for i in cycle for j in cycle if (i, j) in x) <= len(cycle) - 1)
+
+    return callback
+
+
+def task_3_gurobi_pool(dist_map, source, sink, path_num, time_limit):
+    """
+    k shortest simple paths from a single branch-and-bound tree using the solution pool of gurobi
+    :param dist_map: type of dict, initial distances every pair of nodes, 1~6: machines, 0: warehouse, 7: delivery
+    :param source: type of int, source node
+    :param sink: type of int, sink node
+    :param path_num: type of int, number of paths to be found
+    :param time_limit: type of int, time limit in min
+    :return: all_path: all found paths between source and sink containing path value and visited nodes in order,
+             in the format of task_3_exhaustive_dijkstra
+    """
+
+    import gurobipy as gb  # see subtour_callback
+
+    print(f'Gurobi starts solving...\n')
+
+    # params
+    num = max(max(k) for k in dist_map) + 1  # number of nodes
+
+    # arcs in both directions of every edge
+    arcs = {**dist_map, **{(j, i): v for (i, j), v in dist_map.items()}}
+
+    # model for task 3 using gurobi
+    m = gb.Model('task_3_gurobi_pool')
+    m.Params.OutputFlag = 0
+    m.Params.LazyConstraints = 1
+
+    # set time limit in sec and keep the path_num best solutions
+    m.Params.TimeLimit = int(time_limit * 60)
+    m.Params.PoolSearchMode = 2
+    m.Params.PoolSolutions = path_num
+
+    # decision variable
+    x = m.addVars(arcs.keys(), vtype=gb.GRB.BINARY, name='arc')
+
+    # constraints
+    # 1. exactly one arc out of source node, none into it
+    m.addConstr(x.sum(source, '*') == 1)
+    m.addConstr(x.sum('*', source) == 0)
+    # 2. exactly one arc into sink node, none out of it
+    m.addConstr(x.sum('*', sink) == 1)
+    m.addConstr(x.sum(sink, '*') == 0)
+    # 3. for other nodes: inflow == outflow <= 1
+    nodes = [n for n in range(num) if n not in (source, sink)]
+    m.addConstrs(x.sum('*', n) == x.sum(n, '*') for n in nodes)
+    m.addConstrs(x.sum('*', n) <= 1 for n in nodes)
+    # 4. no cycles apart from the path, added lazily, see subtour_callback
+
+    # objective
+    m.setObjective(x.prod(arcs), gb.GRB.MINIMIZE)
+
+    # solve
+    m.optimize(subtour_callback(x, source))
+
+    # read the pool, best first
+    all_path = {}
+    for path_ord in range(1, m.SolCount + 1):
+        m.Params.SolutionNumber = path_ord - 1
+        succ = {i: j for (i, j), v in x.items() if v.Xn > 0.5}
+        node_ord = [source]
+        while node_ord[-1] != sink:
+            node_ord.append(succ[node_ord[-1]])
+        all_path[path_ord] = format_path(round(m.PoolObjVal, 6), node_ord)
+
+    return all_path
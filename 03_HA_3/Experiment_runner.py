@@ -0,0 +1,180 @@
+import os
+import csv
+import time
+import multiprocessing as mp
+import multiprocessing.connection
+from collections import deque
+from Plan_simulator import replay_hanoi, replay_brick
+from Task_1 import toh, toh_bmc
+from Hanoi_search import toh_search
+from Task_2 import single_robot_brick, single_robot_brick_native, test_case
+from Task_2_multi_robots import multi_robot_brick_native
+
+# planners by name: (family, solver, keyword arguments), a solver of family 'hanoi' is called as
+# solver(ds, tws, return_plan=True), 'brick' as solver(bs_ps, ps, bs_class, return_plan=True) and 'robots' as
+# solver(rs, bs_ps, ps, bs_class, return_plan=True); all return the minimum number of steps first, the plan last
+PLANNERS = {'toh': ('hanoi', toh, {}),
+            'toh-bmc': ('hanoi', toh_bmc, {'encoding': 'onehot'}),
+            'toh-bmc-compact': ('hanoi', toh_bmc, {'encoding': 'compact'}),
+            'toh-search': ('hanoi', toh_search, {}),
+            'brick-z3': ('brick', single_robot_brick, {}),
+            'brick-native': ('brick', single_robot_brick_native, {}),
+            'robots-native': ('robots', multi_robot_brick_native, {})}
+
+# result fields in csv column order
+FIELDS = ['planner', 'ds', 'tws', 'rs', 'bs', 'ps', 'cls', 'seed', 'status', 'min_ts', 'valid', 'time', 'error']
+
+
+def make_jobs(planner, sizes, seeds=(0,)):
+    """
+    :param planner: type of str, key of PLANNERS
+    :param sizes: type of list, dicts of the problem size, {'ds', 'tws'} for family 'hanoi', {'bs', 'ps', 'cls'}
+                  for 'brick', where cls is the number of classes, 0 for unique bricks, and 'rs' as well for
+                  'robots'
+    :param seeds: type of list, seeds of the random test cases, see Task_2.test_case
+    :return: jobs: type of list, (planner, size, seed) for every size and seed
+    """
+
+    return [(planner, size, seed) for size in sizes for seed in seeds]
+
+
+def _worker(planner, size, seed, conn):
+    """
+    solve one job in a child process, replay its plan and send the result back
+    :param planner: type of str, key of PLANNERS
+    :param size: type of dict, problem size, see make_jobs
+    :param seed: type of int, seed of the random test case
+    :param conn: type of Connection, where (min_ts, plan valid, time in sec, error message) is sent
+    :return: None
+    """
+
+    try:
+        family, solver, kwargs = PLANNERS[planner]
+        if family == 'hanoi':
+            start_time = time.time()
+            result = solver(size['ds'], size['tws'], return_plan=True, **kwargs)
+            et = time.time() - start_time
+            plan = result[-1]
+            valid = None if plan is None else bool(replay_hanoi(plan, size['ds'], size['tws'])[0])
+        else:
+            bs_ps, bs_class = test_case(size['bs'], size['ps'], size.get('cls', 0), seed)
+            rs = (size['rs'],) if family == 'robots' else ()
+            start_time = time.time()
+            result = solver(*rs, bs_ps, size['ps'], bs_class or None, return_plan=True, **kwargs)
+            et = time.time() - start_time
+            plan = result[-1]
+            valid = bool(replay_brick(plan, bs_ps, size['ps'], bs_class or None)[0])
+        conn.send((None if result[0] is None else int(result[0]), valid, et, None))
+    except Exception as e:
+        conn.send((None, None, None, f'{type(e).__name__}: {e}'))
+    conn.close()
+
+
+def run_experiments(jobs, time_limit, path, workers=None):
+    """
+    run every job in parallel processes, a job still running after the time limit is killed and recorded as a
+    timeout, every result is appended to the csv file as soon as its job finishes
+    :param jobs: type of list, (planner, size, seed), see make_jobs
+    :param time_limit: type of float, wall-clock time limit for each job in min
+    :param path: type of str, output csv path, overwritten
+    :param workers: type of int, maximum number of processes at a time, None for the number of cores
+    :return: results: type of list, one dict per job with the fields in FIELDS, in order of completion
+    """
+
+    workers = workers or os.cpu_count()
+    ctx = mp.get_context('spawn')  # a fresh interpreter per job, same behavior on every OS
+
+    pending = deque(jobs)
+    running = {}  # Connection -> (job, Process, deadline)
+    results = []
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        f.flush()
+
+        def record(job, status, min_ts=None, valid=None, et=None, error=None):
+            planner, size, seed = job
+            results.append({'planner': planner, **{k: size.get(k) for k in ('ds', 'tws', 'rs', 'bs', 'ps', 'cls')},
+                            'seed': seed, 'status': status, 'min_ts': min_ts, 'valid': valid, 'time': et,
+                            'error': error})
+            writer.writerow(results[-1])
+            f.flush()
+            print(f'[{len(results)}/{len(jobs)}] {planner} {size} seed {seed}: {status}'
+                  + (f', {min_ts} steps in {et:.2f} sec' if status == 'ok' else f', {error}' if error else ''))
+
+        while pending or running:
+            # fill the worker pool
+            while pending and len(running) < workers:
+                job = pending.popleft()
+                reader, writer_ = ctx.Pipe(duplex=False)
+                p = ctx.Process(target=_worker, args=(*job, writer_))
+                p.start()
+                writer_.close()
+                running[reader] = (job, p, time.time() + 60 * time_limit)
+
+            # wait for results until the first deadline, a connection is also ready when its process exits
+            timeout = max(0., min(deadline for _, _, deadline in running.values()) - time.time())
+            for reader in mp.connection.wait(list(running), timeout):
+                job, p, _ = running.pop(reader)
+                try:
+                    min_ts, valid, et, error = reader.recv()
+                except EOFError:
+                    min_ts, valid, et, error = None, None, None, f'exited with code {p.exitcode} without a result'
+                reader.close()
+                p.join()
+                record(job, 'error' if error else 'ok', min_ts, valid, et, error)
+
+            # kill the jobs over the time limit
+            for reader in [r for r, (_, _, deadline) in running.items() if deadline <= time.time()]:
+                job, p, _ = running.pop(reader)
+                p.terminate()
+                p.join()
+                reader.close()
+                record(job, 'timeout', et=60. * time_limit)
+
+    return results
+
+
+def main():
+    # params
+    time_limit = 5  # wall-clock time limit for each job in min
+    workers = None  # number of processes at a time, None for the number of cores
+    seeds = range(5)  # seeds of the random test cases
+    path = 'experiment_results.csv'  # output csv path
+
+    # jobs: tower of hanoi
+    jobs = make_jobs('toh', [{'ds': ds, 'tws': 3} for ds in range(3, 8)])
+    for planner in ('toh-bmc', 'toh-bmc-compact'):
+        jobs += make_jobs(planner, [{'ds': ds, 'tws': tws} for tws in (3, 4) for ds in range(3, 11)])
+    jobs += make_jobs('toh-search', [{'ds': ds, 'tws': tws} for tws in (4, 5, 6) for ds in range(6, 13)])
+
+    # jobs: bricks, on random test cases
+    sizes = [{'bs': bs, 'ps': bs + 1, 'cls': cls} for bs in range(3, 9) for cls in (0, 2)]
+    jobs += make_jobs('brick-z3', sizes, seeds)
+    jobs += make_jobs('brick-native', sizes + [{'bs': bs, 'ps': bs + max(1, bs // 10), 'cls': cls}
+                                               for bs in (1000, 10000) for cls in (0, 10)], seeds)
+    jobs += make_jobs('robots-native', [{'rs': rs, 'bs': bs, 'ps': bs + max(1, bs // 10), 'cls': min(cls, bs)}
+                                        for rs, bs in ((3, 6), (10, 100), (50, 1000)) for cls in (0, 10)], seeds)
+
+    # run
+    results = run_experiments(jobs, time_limit, path, workers)
+
+    # summary
+    print('\n*******************************************'
+          '\n******** Experiment results below *********'
+          '\n*******************************************\n')
+    for planner in PLANNERS:
+        runs = [r for r in results if r['planner'] == planner]
+        if runs:
+            solved = [r for r in runs if r['status'] == 'ok']
+            print(f'{planner:<18}{len(runs):>5} jobs{len(solved):>5} solved'
+                  f'{sum(r["status"] == "timeout" for r in runs):>5} timeouts'
+                  f'{sum(r["status"] == "error" for r in runs):>5} errors'
+                  f'{sum(r["valid"] is False for r in solved):>5} invalid plans'
+                  f'{sum(r["time"] for r in solved):>10.2f} sec')
+    print(f'\nResults written to {path}')
+
+
+if __name__ == '__main__':
+    main()
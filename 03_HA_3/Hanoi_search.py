@@ -0,0 +1,211 @@
+import functools
+import numpy as np
+from Plan_simulator import plan_array
+
+# states expanded at once, bounds the memory of a search layer
+CHUNK = 1 << 17
+# largest pattern database in states
+PDB_SIZE = 1 << 20
+
+
+def frame_stewart(ds, tws):
+    """
+    Frame-Stewart number by dynamic programming: park the k smallest disks on a middle tower with all towers,
+    move the others with one tower less, then bring the k disks back; optimal for 3 and 4 towers, an upper
+    bound otherwise
+    :param ds: number of disks
+    :param tws: number of towers
+    :return: number of steps of the best such plan
+    """
+
+    assert tws >= 3, 'Towers must be at least 3!'
+    fs = [2 ** n - 1 for n in range(ds + 1)]  # 3 towers
+    for _ in range(4, tws + 1):
+        fs_ = [0]
+        for n in range(1, ds + 1):
+            fs_.append(min(2 * fs_[k] + fs[n - k] for k in range(n)))
+        fs = fs_
+
+    return fs[ds]
+
+
+def _digits(states, ds, tws):
+    """
+    :param states: type of np.ndarray, (n,) states, digit d in base tws is the tower of disk d, 0 the smallest
+    :return: type of np.ndarray, (n, ds) tower of every disk
+    """
+
+    return states[:, None] // tws ** np.arange(ds, dtype=np.int64) % tws
+
+
+def _number(dig, tws):
+    return dig @ tws ** np.arange(dig.shape[1], dtype=np.int64)
+
+
+def _expand(states, ds, tws):
+    """
+    :param states: type of np.ndarray, (n,) states
+    :return: nxt: type of np.ndarray, (m,) state after every legal move
+             src: type of np.ndarray, (m,) index of the state moved from
+             disk, fr, to: type of np.ndarray, (m,) the move
+    """
+
+    on = _digits(states, ds, tws)[:, :, None] == np.arange(tws)
+    top = np.where(on.any(axis=1), on.argmax(axis=1), ds)  # smallest disk on every tower, ds if empty
+
+    # a top disk moves onto an empty tower or a larger top disk
+    fr, to = np.array([(a, b) for a in range(tws) for b in range(tws) if a != b]).T
+    src, move = np.nonzero(top[:, fr] < top[:, to])
+    fr, to = fr[move], to[move]
+    disk = top[src, fr]
+
+    return states[src] + (to - fr) * tws ** disk.astype(np.int64), src, disk, fr, to
+
+
+def _canonical(states, ds, tws, mirror=False):
+    """
+    :param states: type of np.ndarray, (n,) states
+    :param mirror: True to swap the first and the last tower first
+    :return: type of np.ndarray, (n,) representative of every state: middle towers are interchangeable, so they
+             are relabeled in the order of their largest disk
+    """
+
+    dig = _digits(states, ds, tws)
+    if mirror:
+        dig = np.where(dig == 0, tws - 1, np.where(dig == tws - 1, 0, dig))
+    if tws > 3:
+        on = dig[:, :, None] == np.arange(1, tws - 1)
+        big = np.where(on.any(axis=1), ds - on[:, ::-1].argmax(axis=1), 0)  # largest disk + 1, 0 if empty
+        lab = np.tile(np.arange(tws), (len(states), 1))
+        np.put_along_axis(lab, 1 + np.argsort(-big, axis=1, kind='stable'), np.arange(1, tws - 1), axis=1)
+        dig = np.take_along_axis(lab, dig, axis=1)
+
+    return _number(dig, tws)
+
+
+def _mirror(state, ds, tws):
+    dig = _digits(np.array([state]), ds, tws)
+    return _number(np.where(dig == 0, tws - 1, np.where(dig == tws - 1, 0, dig)), tws)[0]
+
+
+def _member(layer, states):
+    """
+    :param layer: type of np.ndarray, sorted states
+    :param states: type of np.ndarray, states to look up
+    :return: type of np.ndarray, True for every state in layer
+    """
+
+    idx = np.minimum(np.searchsorted(layer, states), max(len(layer) - 1, 0))
+    return layer[idx] == states if len(layer) else np.zeros(len(states), dtype=bool)
+
+
+@functools.lru_cache(maxsize=None)
+def pattern_database(k, tws):
+    """
+    :param k: number of disks
+    :param tws: number of towers
+    :return dist: type of np.ndarray, (tws^k,) minimum number of steps from every state of k disks to all of them
+                  on the last tower, by breadth-first search back from there
+    """
+
+    dist = np.full(tws ** k, -1, dtype=np.int16)
+    frontier = np.array([(tws - 1) * sum(tws ** d for d in range(k))], dtype=np.int64)
+    dist[frontier] = 0
+    while len(frontier):
+        nxt = np.unique(np.concatenate([_expand(frontier[c:c + CHUNK], k, tws)[0]
+                                        for c in range(0, len(frontier), CHUNK)]))
+        nxt = nxt[dist[nxt] < 0]
+        dist[nxt] = dist[frontier[0]] + 1
+        frontier = nxt
+
+    return dist
+
+
+def heuristic(states, ds, tws):
+    """
+    additive pattern databases: the disks are split into groups of consecutive sizes, the moves of one group
+    obey the rules among themselves and are no moves of another, so the sum of the group distances is a lower
+    bound on the number of steps to the last tower
+    :param states: type of np.ndarray, (n,) states
+    :param ds: number of disks
+    :param tws: number of towers
+    :return h: type of np.ndarray, (n,) lower bound of every state
+    """
+
+    k = max(int(np.log(PDB_SIZE) / np.log(tws)), 1)
+    h = np.zeros(len(states), dtype=np.int64)
+    for hi in range(ds, 0, -k):
+        lo = max(hi - k, 0)
+        h += pattern_database(hi - lo, tws)[states // tws ** lo % tws ** (hi - lo)]
+
+    return h
+
+
+def _path(layers, j, state, ds, tws):
+    """
+    :param layers: list of sorted canonical states at every depth of the search
+    :param j: depth of state
+    :param state: type of int, a state whose representative is in layers[j]
+    :return path: list of states from all disks on the first tower to state
+    """
+
+    path = [state]
+    for j in range(j, 0, -1):
+        nxt = _expand(np.array([path[-1]]), ds, tws)[0]
+        path.append(nxt[_member(layers[j - 1], _canonical(nxt, ds, tws))][0])
+
+    return path[::-1]
+
+
+def toh_search(ds, tws, return_plan=False):
+    """
+    explicit-state solver for tower of hanoi with any number of towers: breadth-first search on states packed
+    into integers, up to the middle only, since mirroring the first and the last tower maps a plan onto the
+    reverse of another, so a state at depth k whose mirror was reached at depth k or k - 1 closes a plan of
+    2k or 2k - 1 steps; a state is dropped once its depth plus the pattern database bound exceeds the
+    Frame-Stewart number, which no optimal plan does
+    :param ds: number of disks
+    :param tws: number of towers
+    :param return_plan: True to return the moves as well
+    :return min_ts: minimum number of times/steps
+            plan: np.ndarray of (step, robot, disk, from, to) rows, only if return_plan
+    """
+
+    ub = frame_stewart(ds, tws)
+    if not ds:  # no disk to move
+        return (0, plan_array([])) if return_plan else 0
+    layers = [np.zeros(1, dtype=np.int64)]  # representatives at every depth
+    while True:
+        k = len(layers) - 1
+
+        # 1. meet with a mirror from the previous or this depth
+        mirror = _canonical(layers[k], ds, tws, mirror=True)
+        meet = [(j, _member(layers[j], mirror)) for j in (k - 1, k) if j >= 0]
+        j, hit = next(((j, hit) for j, hit in meet if hit.any()), (None, None))
+        if j is not None:
+            break
+
+        # 2. next depth, new states only: in an undirected graph they are no deeper than k - 1
+        nxt = []
+        for c in range(0, len(layers[k]), CHUNK):
+            states = np.unique(_canonical(_expand(layers[k][c:c + CHUNK], ds, tws)[0], ds, tws))
+            nxt.append(states[k + 1 + heuristic(states, ds, tws) <= ub])
+        nxt = np.unique(np.concatenate(nxt))
+        for prev in layers[-2:]:
+            nxt = nxt[~_member(prev, nxt)]
+        layers.append(nxt)
+
+    min_ts = k + j
+    if not return_plan:
+        return min_ts
+
+    # plan: up to the meeting state, then the mirror of the way to its mirror, backwards
+    state = layers[k][hit][0].item()
+    path = _path(layers, k, state, ds, tws)
+    path += [_mirror(s, ds, tws) for s in _path(layers, j, _mirror(state, ds, tws), ds, tws)[::-1][1:]]
+    dig = _digits(np.array(path), ds, tws)
+    disk = (dig[1:] != dig[:-1]).argmax(axis=1)
+    steps = np.arange(min_ts)
+    plan = plan_array(np.stack([steps, 0 * steps, disk, dig[steps, disk], dig[steps + 1, disk]], axis=1))
+
+    return min_ts, plan
@@ -0,0 +1,146 @@
+import numpy as np
+from z3 import is_true
+
+# columns of a plan, one row per move
+STEP, ROBOT, OBJ, FROM, TO = range(5)
+
+
+def bool_values(model, vs):
+    """
+    :param model: type of z3 ModelRef
+    :param vs: nested lists of Bool variables
+    :return: type of np.ndarray, value of every variable in the model, same shape as vs
+    """
+
+    if isinstance(vs, (list, tuple)):
+        return np.array([bool_values(model, v) for v in vs], dtype=bool)
+    return is_true(model.eval(vs, model_completion=True))
+
+
+def extract_plan(on, moved):
+    """
+    :param on: type of np.ndarray, (ts + 1, objects, places) object on place at each time instance
+    :param moved: type of np.ndarray, (ts, robots, objects) object moved by robot at each step
+    :return plan: type of np.ndarray, (moves, 5) rows of (step, robot, object, from, to), steps without a move
+                  are left out, an object moved by several robots at once is kept for the first one
+    """
+
+    t, r, o = np.nonzero(moved)
+    _, first = np.unique(t * moved.shape[2] + o, return_index=True)
+    t, r, o = t[first], r[first], o[first]
+
+    return plan_array(np.stack([t, r, o, on[t, o].argmax(axis=1), on[t + 1, o].argmax(axis=1)], axis=1))
+
+
+def plan_array(moves):
+    """
+    :param moves: list or np.ndarray of (step, robot, object, from, to)
+    :return plan: type of np.ndarray, (moves, 5) sorted by step and robot, steps renumbered from 0 on
+    """
+
+    plan = np.array(moves, dtype=int).reshape(-1, 5)
+    plan = plan[np.lexsort((plan[:, ROBOT], plan[:, STEP]))]
+    plan[:, STEP] = np.unique(plan[:, STEP], return_inverse=True)[1]
+
+    return plan
+
+
+def _batch(plans):
+    """
+    :param plans: a plan or a list of plans, see extract_plan
+    :return moves: type of np.ndarray, (plans, longest plan, 5), shorter plans padded with rows of robot -1
+    """
+
+    if isinstance(plans, np.ndarray) and plans.ndim == 2:
+        plans = [plans]
+    moves = np.full((len(plans), max([len(p) for p in plans], default=0), 5), -1)
+    for i, p in enumerate(plans):
+        moves[i, :len(p)] = p
+
+    return moves
+
+
+def replay_hanoi(plans, ds, tws):
+    """
+    replay tower of hanoi plans move by move on the tower of every disk, all plans at once
+    :param plans: a plan or a list of plans, see extract_plan
+    :param ds: number of disks
+    :param tws: number of towers
+    :return valid: type of np.ndarray, (plans,) True if every move is legal, one per step, and all disks end on
+                   the last tower
+    """
+
+    moves = _batch(plans)
+    num, idx, disks = len(moves), np.arange(len(moves)), np.arange(ds)
+    pos = np.zeros((num, ds), dtype=int)  # tower of every disk
+    valid = np.ones(num, dtype=bool)
+
+    for k in range(moves.shape[1]):
+        s, r, d, a, b = moves[:, k].T
+        live = r >= 0
+        ok = (d >= 0) & (d < ds) & (a >= 0) & (a < tws) & (b >= 0) & (b < tws) & (a != b)
+        ok &= s > moves[:, k - 1, STEP] if k else s >= 0
+        d = np.where(ok, d, 0)
+        # 1. the disk is on the tower it is moved from
+        ok &= pos[idx, d] == a
+        # 2. stacking rule: no smaller disk on either tower, so it is on top and put on a larger disk
+        ok &= ~((disks < d[:, None]) & ((pos == a[:, None]) | (pos == b[:, None]))).any(axis=1)
+
+        valid &= ok | ~live
+        go = live & valid
+        pos[idx[go], d[go]] = b[go]
+
+    return valid & (pos == tws - 1).all(axis=1)
+
+
+def replay_brick(plans, bs_ps, ps, bs_class=None):
+    """
+    replay brick plans step by step on the brick of every position, all plans at once; moves of the same step
+    are made by different robots at the same time, so each brick must be at its from position and each to
+    position free when the step starts
+    :param plans: a plan or a list of plans, see extract_plan
+    :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
+    :param ps: number of positions
+    :param bs_class: classes of bricks, None for unique bricks
+    :return valid: type of np.ndarray, (plans,) True if every move is legal and every target position ends
+                   with a brick of its class
+    """
+
+    moves = _batch(plans)
+    num, idx, bs = len(moves), np.arange(len(moves)), len(bs_ps)
+    org, tag = np.array([bs_ps[b] for b in range(bs)], dtype=int).reshape(-1, 2).T
+    cls = np.arange(bs)  # a brick of a class stands for all of them
+    for c in bs_class or []:
+        cls[list(c)] = min(c)
+    goal = np.full(ps, -1)
+    goal[tag] = cls
+
+    occ = np.full((num, ps), -1)  # brick on every position, -1 if free
+    occ[:, org] = np.arange(bs)
+    snap = occ.copy()  # occ when the current step started
+    busy = np.zeros((num, max(moves[:, :, ROBOT].max(initial=0), 0) + 1), dtype=bool)  # robot moved in the step
+    prev, valid = np.full(num, -1), np.ones(num, dtype=bool)
+
+    for k in range(moves.shape[1]):
+        s, r, b, a, c = moves[:, k].T
+        live = r >= 0
+        ok = (b >= 0) & (b < bs) & (a >= 0) & (a < ps) & (c >= 0) & (c < ps) & (a != c) & (s >= prev)
+        new = live & (s != prev)
+        snap[new], busy[new] = occ[new], False
+        b, a, c = np.where(ok, b, 0), np.where(ok, a, 0), np.where(ok, c, 0)
+        # 1. the brick is at its from position, and has not been moved yet in this step
+        ok &= (snap[idx, a] == b) & (occ[idx, a] == b)
+        # 2. free-position rule: the to position is free and not taken by another robot in this step
+        ok &= (snap[idx, c] == -1) & (occ[idx, c] == -1)
+        # 3. one move per robot and step
+        ok &= ~busy[idx, np.maximum(r, 0)]
+
+        valid &= ok | ~live
+        go = live & valid
+        occ[idx[go], a[go]] = -1
+        occ[idx[go], c[go]] = b[go]
+        busy[idx[go], r[go]] = True
+        prev = np.where(live, s, prev)
+
+    on_goal = np.where(occ >= 0, cls[occ], -1) == goal
+    return valid & on_goal[:, goal >= 0].all(axis=1)
@@ -1,16 +1,74 @@
+import os
+import sys
+import time
 from z3 import *
 
+# result cache shared with hand-in assignment II
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '02_HA_2'))
+from Result_cache import cached_function
+from Plan_simulator import bool_values, extract_plan, replay_hanoi
+from Hanoi_search import frame_stewart, toh_search
 
-def toh(ds, tws):
+
+def toh_step(x, x_, y, m, n, one_move=False):
+    """
+    constraints of a single step of tower of hanoi
+    :param x: x[d][tw], disk d on tower tw before the step
+    :param x_: x_[d][tw], disk d on tower tw after the step
+    :param y: y[d], disk d is moved
+    :param m: m[tw], the disk is moved from tower tw
+    :param n: n[tw], the disk is moved to tower tw
+    :param one_move: True for exactly one move in the step, False for at most one
+    :return constraints: list of constraints
+    """
+
+    ds, tws = len(x), len(m)
+
+    # 1. precondition 1
+    precon_1 = [Implies(And(x[d][tw], Or([x[d_][tw] for d_ in range(d)])),
+                        Not(y[d]))
+                for d in range(ds) for tw in range(tws)]
+    # 2. precondition 2
+    precon_2 = [Implies(And(x[d][tw], Or([x[d_][tw_] for d_ in range(d)])),
+                        Not(And(y[d], n[tw_])))
+                for d in range(ds) for tw in range(tws) for tw_ in range(tws) if tw != tw_]
+    # 3. uniqueness of m (from)
+    unique_m = [Implies(And(x[d][tw], y[d]),
+                        And(m[tw], And([Not(m[tw_]) for tw_ in range(tws) if tw != tw_])))
+                for d in range(ds) for tw in range(tws)]
+    # 4. uniqueness of n (to)
+    unique_n = [n[tw] == And([Not(n[tw_]) for tw_ in range(tws) if tw != tw_])
+                for tw in range(tws)]
+    # 5. uniqueness of y (obj)
+    unique_y = [(PbEq if one_move else PbLe)([(y[d], 1) for d in range(ds)], 1)]
+    # 6. non-moving disks
+    non_moving = [Implies(And(Not(y[d]), x[d][tw]),
+                          And(x_[d][tw], And([Not(x_[d][tw_]) for tw_ in range(tws) if tw != tw_])))
+                  for d in range(ds) for tw in range(tws)]
+    # 7. distinct of m (from) and n (to)
+    distinct_m_n = [Implies(m[tw],
+                            Not(n[tw]))
+                    for tw in range(tws)]
+    # 8. update
+    update = [Implies(And(y[d], m[tw], n[tw_]),
+                      And(x_[d][tw_], And([Not(x_[d][tw__]) for tw__ in range(tws) if tw_ != tw__])))
+              for d in range(ds) for tw in range(tws) for tw_ in range(tws) if tw != tw_]
+
+    return precon_1 + precon_2 + unique_m + unique_n + unique_y + non_moving + distinct_m_n + update
+
+
+def toh(ds, tws, return_plan=False):
     """
     solver for tower of hanoi problem
     :param ds: number of disks
     :param tws: number of towers
+    :param return_plan: True to return the moves as well
     :return min_ts: minimum number of times/steps
+            plan: np.ndarray of (step, robot, disk, from, to) rows, only if return_plan
     """
 
     # params
-    ts = 2 ** ds  # maximum number of steps
+    ts = frame_stewart(ds, tws)  # maximum number of steps, 2^ds - 1 with 3 towers
 
     # model for task 1
     s = Optimize()
@@ -23,43 +81,11 @@ def toh(ds, tws):
     n = [[Bool(f'to_{tw}_{t}') for t in range(ts)] for tw in range(tws)]
 
     # constraints
-    # 1. precondition 1
-    precon_1 = [Implies(And(x[d][tw][t], Or([x[d_][tw][t] for d_ in range(d)])),
-                        Not(y[d][t]))
-                for t in range(ts) for d in range(ds) for tw in range(tws)]
-    s.add(precon_1)
-    # 2. precondition 2
-    precon_2 = [Implies(And(x[d][tw][t], Or([x[d_][tw_][t] for d_ in range(d)])),
-                        Not(And(y[d][t], n[tw_][t])))
-                for t in range(ts) for d in range(ds) for tw in range(tws) for tw_ in range(tws) if tw != tw_]
-    s.add(precon_2)
-    # 3. uniqueness of m (from)
-    unique_m = [Implies(And(x[d][tw][t], y[d][t]),
-                        And(m[tw][t], And([Not(m[tw_][t]) for tw_ in range(tws) if tw != tw_])))
-                for t in range(ts) for d in range(ds) for tw in range(tws)]
-    s.add(unique_m)
-    # 4. uniqueness of n (to)
-    unique_n = [n[tw][t] == And([Not(n[tw_][t]) for tw_ in range(tws) if tw != tw_])
-                for t in range(ts) for tw in range(tws)]
-    s.add(unique_n)
-    # 5. uniqueness of y (obj)
-    unique_y = [PbLe([(y[d][t], 1) for d in range(ds)], 1) for t in range(ts)]
-    s.add(unique_y)
-    # 6. non-moving disks
-    non_moving = [Implies(And(Not(y[d][t]), x[d][tw][t]),
-                          And(x[d][tw][t + 1], And([Not(x[d][tw_][t + 1]) for tw_ in range(tws) if tw != tw_])))
-                  for t in range(ts) for d in range(ds) for tw in range(tws)]
-    s.add(non_moving)
-    # 7. distinct of m (from) and n (to)
-    distinct_m_n = [Implies(m[tw][t],
-                            Not(n[tw][t]))
-                    for t in range(ts) for tw in range(tws)]
-    s.add(distinct_m_n)
-    # 8. update
-    update = [Implies(And(y[d][t], m[tw][t], n[tw_][t]),
-                      And(x[d][tw_][t + 1], And([Not(x[d][tw__][t + 1]) for tw__ in range(tws) if tw_ != tw__])))
-              for t in range(ts) for d in range(ds) for tw in range(tws) for tw_ in range(tws) if tw != tw_]
-    s.add(update)
+    # 1~8. every step, see toh_step
+    for t in range(ts):
+        s.add(toh_step([[x[d][tw][t] for tw in range(tws)] for d in range(ds)],
+                       [[x[d][tw][t + 1] for tw in range(tws)] for d in range(ds)],
+                       [y[d][t] for d in range(ds)], [m[tw][t] for tw in range(tws)], [n[tw][t] for tw in range(tws)]))
     # 9. initial and final state
     state = [And(x[d][0][0], x[d][tws - 1][ts])
              for d in range(ds)]
@@ -77,17 +103,250 @@ def toh(ds, tws):
 
     # get result
     min_ts = sum([s.model()[z[t]].as_long() for t in range(ts)])
+    if return_plan:
+        model = s.model()
+        return min_ts, extract_plan(bool_values(model, x).transpose(2, 0, 1), bool_values(model, y).T[:, None, :])
 
     return min_ts
 
 
+def toh_lower_bound(ds, tws):
+    """
+    :param ds: number of disks
+    :param tws: number of towers
+    :return: lower bound on the number of steps for any number of towers, 2 * ds - 1 since every smaller disk
+             has to leave the first tower and reach the last one around the single move of the largest disk;
+             it does not use the closed form 2^ds - 1 of 3 towers, so bmc refutes every shorter horizon itself
+    """
+
+    return max(0, 2 * ds - 1)
+
+
+def exactly_one(vs):
+    """
+    :param vs: list of Bool variables
+    :return constraints: at least one and pairwise at most one as clauses, which propagate better than PbEq here
+    """
+
+    return [Or(vs)] + [Or(Not(vs[i]), Not(vs[j])) for i in range(len(vs)) for j in range(i + 1, len(vs))]
+
+
+def toh_compact_step(x, x_, y, n, t):
+    """
+    compact constraints of a single step of tower of hanoi with exactly one move: successor-state axioms
+    instead of frame and update implications, and cumulative variables for the smaller disks on each tower
+    instead of a disjunction over them in every precondition, so the step grows linearly in disks and towers
+    :param x: x[d][tw], disk d on tower tw before the step
+    :param x_: x_[d][tw], disk d on tower tw after the step
+    :param y: y[d], disk d is moved
+    :param n: n[tw], the disk is moved to tower tw
+    :param t: time instance of the step, for the names of the auxiliary variables
+    :return constraints: list of constraints
+    """
+
+    ds, tws = len(x), len(n)
+
+    # auxiliary variable: a disk smaller than d on tower tw, c[0] is always false
+    c = [[BoolVal(False)] * tws] + [[Bool(f'smaller_{d}_{tw}_{t}') for tw in range(tws)] for d in range(1, ds)]
+
+    # 1. cumulative smaller disks
+    smaller = [c[d + 1][tw] == Or(c[d][tw], x[d][tw]) for d in range(ds - 1) for tw in range(tws)]
+    # 2. exactly one disk moves to exactly one tower
+    one_move = exactly_one(y) + exactly_one(n)
+    # 3. precondition: the moved disk is on top of its tower and smaller than the top disk of the target tower
+    precon = [Implies(And(y[d], x[d][tw]), And(Not(c[d][tw]), Not(n[tw])))
+              for d in range(ds) for tw in range(tws)]
+    precon += [Implies(And(y[d], n[tw]), Not(c[d][tw])) for d in range(1, ds) for tw in range(tws)]
+    # 4. successor state: a disk is on a tower if it stays there or is moved there
+    successor = [x_[d][tw] == Or(And(x[d][tw], Not(y[d])), And(y[d], n[tw])) for d in range(ds) for tw in range(tws)]
+    # 5. every disk on exactly one tower, implied by 4 but helps propagation
+    one_tower = [c for d in range(ds) for c in exactly_one(x_[d])]
+
+    return smaller + one_move + precon + successor + one_tower
+
+
+def toh_bmc(ds, tws, encoding='onehot', time_limit=None, return_plan=False):
+    """
+    bounded model checking for tower of hanoi: a single incremental solver gets one step with exactly one
+    move at a time, from the lower bound on, and checks the final state under an assumption literal of the
+    current horizon, so the first satisfiable horizon is the minimum number of steps
+    :param ds: number of disks
+    :param tws: number of towers, at least 3
+    :param encoding: 'onehot' for the constraints of toh_step, 'compact' for toh_compact_step, which also never
+                     moves the same disk twice in a row and uses the middle towers in order, both of which every
+                     minimal plan does or can be relabeled to do
+    :param time_limit: time limit in min, None for no limit
+    :param return_plan: True to return the moves as well
+    :return min_ts: minimum number of times/steps, None if the time limit is reached
+            layers: list of (horizon, clauses, variables, time in sec since the previous check) of every check
+            plan: np.ndarray of (step, robot, disk, from, to) rows, None if the time limit is reached, only if
+                  return_plan
+    """
+
+    # with fewer towers no horizon is satisfiable from 2 disks on, so the deepening would never end
+    assert tws >= 3, 'Towers must be at least 3!'
+
+    # model for task 1
+    s = Solver()
+
+    # decision variable, the state at each time instance is added with its step
+    x = [[[Bool(f'on_{d}_{tw}_0') for tw in range(tws)] for d in range(ds)]]
+    ys = []  # moved disk of every step
+    y_prev, used = None, [BoolVal(False)] * tws  # moved disk of the previous step, towers moved to so far
+
+    # constraints
+    # 9. initial state: every disk on the first tower only
+    s.add([x[0][d][tw] == (tw == 0) for d in range(ds) for tw in range(tws)])
+
+    lb, layers, res = toh_lower_bound(ds, tws), [], unknown
+    start_time = deadline = time.time()
+    deadline += time_limit * 60 if time_limit is not None else float('inf')
+    while True:
+        t = len(x) - 1
+
+        # 1~8. next step, see toh_step or toh_compact_step
+        x.append([[Bool(f'on_{d}_{tw}_{t + 1}') for tw in range(tws)] for d in range(ds)])
+        ys.append([Bool(f'obj_{d}_{t}') for d in range(ds)])
+        y, n = ys[-1], [Bool(f'to_{tw}_{t}') for tw in range(tws)]
+        if encoding == 'onehot':
+            m = [Bool(f'from_{tw}_{t}') for tw in range(tws)]
+            s.add(toh_step(x[t], x[t + 1], y, m, n, one_move=True))
+        else:
+            s.add(toh_compact_step(x[t], x[t + 1], y, n, t))
+            # 10. never the same disk twice in a row, it could move once or not at all instead
+            if y_prev is not None:
+                s.add([Or(Not(y_prev[d]), Not(y[d])) for d in range(ds)])
+                # with 3 towers the only other move not of the smallest disk would undo the previous one,
+                # so the smallest disk moves every other step
+                if tws == 3:
+                    s.add(Or(y_prev[0], y[0]))
+            # 11. symmetry of the middle towers: a middle tower is a target only after the one before it
+            s.add([Implies(n[tw], used[tw - 1]) for tw in range(2, tws - 1)])
+            used_ = [Bool(f'used_{tw}_{t + 1}') for tw in range(tws)]
+            s.add([used_[tw] == Or(used[tw], n[tw]) for tw in range(tws)])
+            y_prev, used = y, used_
+        if t + 1 < lb:
+            continue
+
+        # 9. final state, assumed for this horizon only
+        goal = Bool(f'goal_{t + 1}')
+        s.add(Implies(goal, And([x[t + 1][d][tws - 1] for d in range(ds)])))
+        if time.time() >= deadline:
+            break
+        s.set('timeout', int(min(deadline - time.time(), 2 ** 31 / 1e3) * 1e3))
+        res = s.check(goal)
+
+        # clauses and variables of the solver after this check
+        st = s.statistics()
+        stat = {k: st.get_key_value(k) if k in st.keys() else 0 for k in ('mk clause', 'mk clause binary',
+                                                                          'mk bool var')}
+        layers.append((t + 1, stat['mk clause'] + stat['mk clause binary'], stat['mk bool var'],
+                       time.time() - start_time))
+        print(f'Horizon {t + 1}: {res}, {layers[-1][1]} clauses, {layers[-1][2]} variables, '
+              f'{layers[-1][3]:.2f} sec')
+        if res != unsat:
+            break
+        start_time = time.time()
+
+    if res != sat:
+        return (None, layers, None) if return_plan else (None, layers)
+    if return_plan:
+        model = s.model()
+        return t + 1, layers, extract_plan(bool_values(model, x), bool_values(model, ys)[:, None, :])
+    return t + 1, layers
+
+
+def toh_step_size(ds, tws, encoding):
+    """
+    :param ds: number of disks
+    :param tws: number of towers
+    :param encoding: 'onehot' or 'compact', see toh_bmc
+    :return: number of clauses and variables of a single step in conjunctive normal form
+    """
+
+    x = [[[Bool(f'on_{d}_{tw}_{t}') for tw in range(tws)] for d in range(ds)] for t in range(2)]
+    y, n = [Bool(f'obj_{d}') for d in range(ds)], [Bool(f'to_{tw}') for tw in range(tws)]
+    if encoding == 'onehot':
+        step = toh_step(x[0], x[1], y, [Bool(f'from_{tw}') for tw in range(tws)], n, one_move=True)
+    else:
+        step = toh_compact_step(x[0], x[1], y, n, 0)
+
+    goal = Goal()
+    goal.add(step)
+    clauses = [c for sub in Then('simplify', 'card2bv', 'tseitin-cnf')(goal) for c in sub]
+
+    # variables, including the ones introduced by the conversion
+    variables, todo = set(), list(clauses)
+    while todo:
+        e = todo.pop()
+        if is_const(e) and e.decl().kind() == Z3_OP_UNINTERPRETED:
+            variables.add(e.decl().name())
+        todo.extend(e.children())
+
+    return len(clauses), len(variables)
+
+
+def toh_compare(disks, tws=3, time_limit=10):
+    """
+    compare model size and solving time of the bmc encodings, replaying every plan found
+    :param disks: list of numbers of disks
+    :param tws: number of towers
+    :param time_limit: time limit for each run in min
+    :return results: list of (disks, encoding, min_ts, clauses per step, variables per step, time in sec,
+                     plan valid)
+    """
+
+    results = []
+    for ds in disks:
+        for encoding in ('onehot', 'compact'):
+            print(f'{encoding} encoding starts solving {ds} disks and {tws} towers...')
+            # not cached: a run stopped by the time limit must be retried next time
+            min_ts, layers, plan = toh_bmc(ds, tws, encoding, time_limit, return_plan=True)
+            valid = None if plan is None else bool(replay_hanoi(plan, ds, tws)[0]) and len(plan) == min_ts
+            results.append((ds, encoding, min_ts, *toh_step_size(ds, tws, encoding),
+                            sum(layer[3] for layer in layers), valid))
+
+    print(f'\n{"Disks":>6}{"Encoding":>10}{"Steps":>8}{"Clauses/step":>14}{"Variables/step":>16}{"Time":>10}'
+          f'{"Valid":>7}')
+    for ds, encoding, min_ts, clauses, variables, et, valid in results:
+        print(f'{ds:>6}{encoding:>10}{str(min_ts):>8}{clauses:>14}{variables:>16}{et:>9.2f}s{str(valid):>7}'
+              + ('' if min_ts is not None else f' (time limit {time_limit} min)'))
+    print()
+
+    return results
+
+
 def main():
     # compare z3 results with groundtruth
     for ds in range(3, 8):
         min_ts_true = 2 ** ds - 1
-        min_ts_z3 = toh(ds, 3)
+        min_ts_z3, plan = cached_function(toh)(ds, 3, return_plan=True)
         print(f"Given {ds} disks and 3 towers, what's the minimum number of steps?")
-        print(f'In theory: {min_ts_true}\tZ3: {min_ts_z3}\n')
+        print(f'In theory: {min_ts_true}\tZ3: {min_ts_z3}\tPlan valid: {replay_hanoi(plan, ds, 3)[0]}\n')
+
+    # bounded model checking, also for more towers
+    for ds, tws in [(ds, 3) for ds in range(3, 8)] + [(ds, 4) for ds in range(3, 7)]:
+        print(f"Given {ds} disks and {tws} towers, what's the minimum number of steps?")
+        min_ts_bmc, layers, plan = cached_function(toh_bmc)(ds, tws, return_plan=True)
+        print(f'Lower bound: {toh_lower_bound(ds, tws)}\tUpper bound: {frame_stewart(ds, tws)}\t'
+              f'Search: {toh_search(ds, tws)}\tZ3 BMC: {min_ts_bmc} '
+              f'({len(layers)} checks, {sum(layer[3] for layer in layers):.2f} sec)\t'
+              f'Plan valid: {replay_hanoi(plan, ds, tws)[0]}\n')
+
+    # explicit-state search for more disks and towers
+    for tws, disks in [(4, range(10, 15)), (5, range(10, 13)), (6, range(10, 12))]:
+        for ds in disks:
+            start_time = time.time()
+            min_ts, plan = toh_search(ds, tws, return_plan=True)
+            et = time.time() - start_time
+            print(f'{ds} disks and {tws} towers, Frame-Stewart: {frame_stewart(ds, tws)}\tSearch: {min_ts}\t'
+                  f'Plan valid: {replay_hanoi(plan, ds, tws)[0]}\t'
+                  f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms')
+    print()
+
+    # one-hot against compact encoding
+    toh_compare(range(3, 9), 3, time_limit=10)
+    toh_compare(range(3, 8), 4, time_limit=10)
 
 
 if __name__ == '__main__':
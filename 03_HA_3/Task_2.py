@@ -1,16 +1,26 @@
+import os
+import sys
 import time
 import random
+import numpy as np
 from z3 import *
 
+# result cache shared with hand-in assignment II
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '02_HA_2'))
+from Result_cache import cached_function
+from Plan_simulator import bool_values, extract_plan, plan_array, replay_brick
 
-def single_robot_brick(bs_ps, ps, bs_class=None):
+
+def single_robot_brick(bs_ps, ps, bs_class=None, return_plan=False):
     """
     solver for tower of hanoi problem
     :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
     :param ps: number of positions
     :param bs_class: classes of bricks, None for unique bricks
+    :param return_plan: True to return the moves as well
     :return min_ts: minimum number of times/steps
             et: execution time
+            plan: np.ndarray of (step, robot, brick, from, to) rows, only if return_plan
     """
 
     # params
@@ -82,28 +92,150 @@ def single_robot_brick(bs_ps, ps, bs_class=None):
 
     # get result
     min_ts = sum([s.model()[z[t]].as_long() for t in range(ts)])
+    if return_plan:
+        model = s.model()
+        plan = extract_plan(bool_values(model, x).transpose(2, 0, 1), bool_values(model, y).T[:, None, :])
+        return min_ts, time.time() - start_time, plan
 
     return min_ts, time.time() - start_time
 
 
-def test_case(bs, ps, bs_class_num=0):
+def brick_chains(bs_ps, ps, bs_class=None):
+    """
+    split a rearrangement into chains of moves to be made in order: a misplaced brick waits for the brick on its
+    target, so the waits form paths, which start with a brick whose target is free, and cycles, which start by
+    parking one of their bricks on a free position and end by moving it to its target
+    with classes, a brick already on a target of its class stays there and the others take the remaining targets
+    of their class; then the targets of two bricks of a class in different chains are swapped, which joins the
+    chains, as long as one of them is a cycle, so a cycle is left only where the origins of the moved bricks of
+    its classes are exactly their targets, which needs a cycle in any plan
+    :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
+    :param ps: number of positions
+    :param bs_class: classes of bricks, None for unique bricks
+    :return chains: list of chains, each a list of (brick, from, to) moves in order, -1 for the free position
+    """
+
+    bs = len(bs_ps)
+    org, tag = np.array([bs_ps[b] for b in range(bs)], dtype=int).reshape(-1, 2).T
+    cls = np.arange(bs)  # a brick of a class stands for all of them
+    for c in bs_class or []:
+        cls[list(c)] = min(c)
+
+    # 1. assignment: stay on a target of the class, or take one of the rest of the class
+    goal = np.full(ps, -1)
+    goal[tag] = cls
+    stay = goal[org] == cls
+    goal[org[stay]] = -1
+    moved = np.flatnonzero(~stay)
+    moved = moved[np.argsort(cls[moved], kind='stable')]
+    tag = org.copy()
+    tag[moved] = np.flatnonzero(goal >= 0)[np.argsort(goal[goal >= 0], kind='stable')]
+
+    def waits():
+        """
+        :return: waiter: brick waiting for every brick, -1 if none
+                 comp: chain of every moved brick
+                 starts: first brick of every chain, paths first
+                 path: True for a path, False for a cycle
+        """
+
+        occ = np.full(ps, -1)
+        occ[org] = np.arange(bs)
+        waiter, blocker = np.full(bs, -1), occ[tag[moved]]
+        waiter[blocker[blocker >= 0]] = moved[blocker >= 0]
+        comp, starts = np.full(bs, -1), []
+        for start in [*moved[blocker < 0].tolist(), *moved.tolist()]:
+            if comp[start] < 0:
+                starts.append(start)
+                b = start
+                while b >= 0 and comp[b] < 0:
+                    comp[b], b = len(starts) - 1, waiter[b]
+        return waiter, comp, starts, [occ[tag[b]] < 0 for b in starts]
+
+    # 2. join cycles into other chains of the class
+    waiter, comp, starts, path = waits()
+    parent = list(range(len(starts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = i = parent[parent[i]]
+        return i
+
+    for c in np.split(moved, np.flatnonzero(np.diff(cls[moved])) + 1):
+        for b in c[1:]:
+            i, j = find(comp[c[0]]), find(comp[b])
+            if i != j and not (path[i] and path[j]):
+                tag[c[0]], tag[b] = tag[b], tag[c[0]]
+                parent[j], path[i] = i, path[i] or path[j]
+    waiter, comp, starts, path = waits()
+    assert ps > bs or all(path), 'Positions must be more than bricks to break a cycle!'
+
+    # 3. moves of every chain
+    chains = []
+    for b, is_path in zip(starts, path):
+        chain = [(b, org[b], tag[b] if is_path else -1)]
+        while waiter[b] >= 0 and waiter[b] != chain[0][0]:
+            b = waiter[b]
+            chain.append((b, org[b], tag[b]))
+        if not is_path:
+            chain.append((chain[0][0], -1, tag[chain[0][0]]))
+        chains.append([tuple(int(v) for v in move) for move in chain])
+
+    return chains
+
+
+def single_robot_brick_native(bs_ps, ps, bs_class=None, return_plan=False):
+    """
+    polynomial-time solver for the single robot, see brick_chains: every misplaced brick moves once and every
+    cycle once more, which is the minimum, paths are made first and cycles then park on one free position
+    :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
+    :param ps: number of positions
+    :param bs_class: classes of bricks, None for unique bricks
+    :param return_plan: True to return the moves as well
+    :return min_ts: minimum number of times/steps
+            et: execution time
+            plan: np.ndarray of (step, robot, brick, from, to) rows, only if return_plan
+    """
+
+    start_time = time.time()
+    chains = brick_chains(bs_ps, ps, bs_class)  # paths first
+    moves = [move for chain in chains for move in chain]
+    min_ts = len(moves)
+    if not return_plan:
+        return min_ts, time.time() - start_time
+
+    # free position after the paths: neither the target of a path nor the origin of a cycle
+    taken = np.zeros(ps, dtype=bool)
+    taken[[b_p[0] for b_p in bs_ps.values()]] = True
+    for chain in chains:
+        if chain[0][2] >= 0:
+            taken[[m[1] for m in chain]], taken[[m[2] for m in chain]] = False, True
+    park = int(np.argmin(taken))
+    plan = plan_array([(t, 0, b, park if p < 0 else p, park if p_ < 0 else p_) for t, (b, p, p_) in enumerate(moves)])
+
+    return min_ts, time.time() - start_time, plan
+
+
+def test_case(bs, ps, bs_class_num=0, seed=None):
     """
     randomly generate a test case
     :param bs: number of bricks
     :param ps: number of positions
     :param bs_class_num: classes of bricks, 0 for unique bricks
+    :param seed: seed of the random generator, the same seed gives the same case, None for the global one
     :return: bs_ps dict
              bs_class list
     """
 
     # randomly generate brick-position pairs
     assert bs < ps, 'Positions must be more than bricks!'
+    rng = random.Random(seed) if seed is not None else random
     ps_list = [i for i in range(ps)]
-    org, tag = random.sample(range(ps), bs), []
+    org, tag = rng.sample(range(ps), bs), []
     for i in range(bs):
-        p = random.choice(ps_list)
+        p = rng.choice(ps_list)
         while p == org[i]:
-            p = random.choice(ps_list)
+            p = rng.choice(ps_list)
         tag.append(p)
         ps_list.remove(p)
 
@@ -117,7 +249,7 @@ def test_case(bs, ps, bs_class_num=0):
             if i == bs_class_num - 1:  # the last round
                 cls = tuple(bs_list)
             else:
-                cls = tuple(random.sample(bs_list, num))
+                cls = tuple(rng.sample(bs_list, num))
                 for each in cls:
                     bs_list.remove(each)
             bs_class.append(cls)
@@ -131,9 +263,11 @@ def main():
     for bs in range(1, 8):
         ps = bs + 1
         bs_ps, _ = test_case(bs, ps)
-        min_ts, et = single_robot_brick(bs_ps, ps)
+        min_ts, et, plan = cached_function(single_robot_brick)(bs_ps, ps, return_plan=True)
         print(f'{bs} unique bricks and {ps} positions, solvable within {min_ts} steps, '
-              f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms')
+              f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms, '
+              f'plan valid: {replay_brick(plan, bs_ps, ps)[0]}, '
+              f'native: {single_robot_brick_native(bs_ps, ps)[0]} steps')
 
     # test: bricks with classes
     print('******************** Bricks with classes ********************')
@@ -141,9 +275,22 @@ def main():
         ps = bs + 1
         cls_num = random.choice(range(2, bs))
         bs_ps, bs_class = test_case(bs, ps, bs_class_num=cls_num)
-        min_ts, et = single_robot_brick(bs_ps, ps, bs_class=bs_class)
+        min_ts, et, plan = cached_function(single_robot_brick)(bs_ps, ps, bs_class=bs_class, return_plan=True)
         print(f'{bs} bricks in {cls_num} classes and {ps} positions, solvable within {min_ts} steps, '
-              f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms')
+              f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms, '
+              f'plan valid: {replay_brick(plan, bs_ps, ps, bs_class)[0]}, '
+              f'native: {single_robot_brick_native(bs_ps, ps, bs_class)[0]} steps')
+
+    # native solver for thousands of bricks
+    print('******************** Native solver ********************')
+    for bs in (1000, 5000, 20000):
+        ps = bs + bs // 10
+        for cls_num in (0, 10):
+            bs_ps, bs_class = test_case(bs, ps, bs_class_num=cls_num)
+            min_ts, et, plan = single_robot_brick_native(bs_ps, ps, bs_class, return_plan=True)
+            print(f'{bs} bricks in {cls_num or bs} classes and {ps} positions, solvable within {min_ts} steps, '
+                  f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms, '
+                  f'plan valid: {replay_brick(plan, bs_ps, ps, bs_class)[0]}')
 
 
 if __name__ == '__main__':
@@ -1,17 +1,27 @@
+import os
+import sys
 import time
+import numpy as np
 from z3 import *
-from Task_2 import test_case
+from Task_2 import test_case, brick_chains
 
+# result cache shared with hand-in assignment II
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '02_HA_2'))
+from Result_cache import cached_function
+from Plan_simulator import bool_values, extract_plan, plan_array, replay_brick
 
-def multi_robot_brick(rs, bs_ps, ps, bs_class=None):
+
+def multi_robot_brick(rs, bs_ps, ps, bs_class=None, return_plan=False):
     """
     solver for tower of hanoi problem
     :param rs: number of robots
     :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
     :param ps: number of positions
     :param bs_class: classes of bricks, None for unique bricks
+    :param return_plan: True to return the moves as well
     :return min_ts: minimum number of times/steps
             et: execution time
+            plan: np.ndarray of (step, robot, brick, from, to) rows, only if return_plan
     """
 
     # params
@@ -47,7 +57,6 @@ def multi_robot_brick(rs, bs_ps, ps, bs_class=None):
     # 4. uniqueness of y (obj) TBC
     unique_y = [PbLe([(y[r][b][t], 1) for b in range(bs) for r in range(rs)], rs) for t in range(ts)]
     s.add(unique_y)
-    pp(unique_y)
     # 5. non-moving bricks
     non_moving = [Implies(And(Not(Or([y[r][b][t] for r in range(rs)])), x[b][p][t]),
                           And(x[b][p][t + 1], And([Not(x[b][p_][t + 1]) for p_ in range(ps) if p != p_])))
@@ -85,16 +94,189 @@ def multi_robot_brick(rs, bs_ps, ps, bs_class=None):
 
     # get result
     min_ts = sum([s.model()[z[t]].as_long() for t in range(ts)])
+    if return_plan:
+        model = s.model()
+        plan = extract_plan(bool_values(model, x).transpose(2, 0, 1), bool_values(model, y).transpose(2, 0, 1))
+        return min_ts, time.time() - start_time, plan
 
     return min_ts, time.time() - start_time
 
 
+def list_schedule(rs, org, tag, ps, split=True):
+    """
+    list scheduling of the moves step by step: every brick whose target is free can move, the robots take those
+    with the longest chain of bricks waiting behind them first; robots left over park a brick on a spare position,
+    one that is no target: a brick of every cycle, longest first, which opens the cycle, and with split the middle
+    brick of every chain longer than an even share of the remaining moves, which lets both halves run at once
+    :param rs: number of robots
+    :param org: type of np.ndarray, (bs,) initial position of every brick
+    :param tag: type of np.ndarray, (bs,) target position of every brick
+    :param ps: number of positions
+    :param split: True to split long chains, False to park a brick of a cycle only
+    :return plan: type of np.ndarray, (moves, 5) rows of (step, robot, brick, from, to)
+    """
+
+    bs = len(org)
+    pos, occ = org.copy(), np.full(ps, -1)
+    occ[org] = np.arange(bs)
+    spare = np.ones(ps, dtype=bool)
+    spare[tag] = False
+
+    plan, t = [], 0
+    while (pos != tag).any():
+        # 1. chains of waits: a brick waits for the brick on its target
+        todo = np.flatnonzero(pos != tag)
+        blocker = occ[tag[todo]]
+        waiter = np.full(bs, -1)
+        waiter[blocker[blocker >= 0]] = todo[blocker >= 0]
+        chains, seen = [], np.zeros(bs, dtype=bool)
+        for b in [*todo[blocker < 0].tolist(), *todo.tolist()]:
+            if not seen[b]:
+                chains.append([b])
+                seen[b] = True
+                while waiter[chains[-1][-1]] >= 0 and not seen[waiter[chains[-1][-1]]]:
+                    chains[-1].append(waiter[chains[-1][-1]])
+                    seen[chains[-1][-1]] = True
+        paths = sorted([c for c in chains if occ[tag[c[0]]] < 0], key=len, reverse=True)
+        cycles = sorted([c for c in chains if occ[tag[c[0]]] >= 0], key=len, reverse=True)
+
+        # 2. moves to a free target, the longest chains first
+        moves = [(b, pos[b], tag[b]) for b in [c[0] for c in paths[:rs]]]
+        # 3. parking: cycles first, then the middle of long chains
+        share = -(-len(todo) // rs)
+        parks = [c[0] for c in cycles]
+        if split:
+            parks += [c[len(c) // 2] for c in paths if len(c) > max(share, 3)]
+        spots = np.flatnonzero(spare & (occ < 0))
+        moves += [(b, pos[b], p) for b, p in zip(parks[:rs - len(moves)], spots)]
+
+        for r, (b, p, p_) in enumerate(moves):
+            occ[p] = -1
+            plan.append((t, r, b, p, p_))
+        for b, p, p_ in moves:
+            occ[p_], pos[b] = b, p_
+        t += 1
+
+    return plan_array(plan)
+
+
+def multi_robot_exact(rs, bs_ps, ps, bs_class, ts, time_limit=None):
+    """
+    exact model of the multi-robot problem for a fixed number of steps: a brick moves to a position free when the
+    step starts, at most rs bricks move in a step and no two bricks share a position
+    :param rs: number of robots
+    :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
+    :param ps: number of positions
+    :param bs_class: classes of bricks, None for unique bricks
+    :param ts: number of times/steps
+    :param time_limit: time limit in min, None for no limit
+    :return res: result of the check, sat, unsat or unknown if the time limit is reached
+            plan: type of np.ndarray, (moves, 5) rows of (step, robot, brick, from, to), None unless sat
+    """
+
+    bs = len(bs_ps)
+    s = Solver()
+    if time_limit is not None:
+        s.set('timeout', max(1, int(time_limit * 60 * 1e3)))
+
+    # decision variable
+    x = [[Int(f'pos_{b}_{t}') for t in range(ts + 1)] for b in range(bs)]
+
+    # constraints
+    # 1. range and distinct positions
+    s.add([And(0 <= x[b][t], x[b][t] < ps) for b in range(bs) for t in range(ts + 1)])
+    s.add([Distinct([x[b][t] for b in range(bs)]) for t in range(ts + 1)])
+    # 2. precondition: the target is free when the step starts
+    s.add([Implies(x[b][t + 1] != x[b][t], And([x[b_][t] != x[b][t + 1] for b_ in range(bs) if b != b_]))
+           for b in range(bs) for t in range(ts)])
+    # 3. at most one move per robot
+    s.add([PbLe([(x[b][t + 1] != x[b][t], 1) for b in range(bs)], rs) for t in range(ts)])
+    # 4. initial and final state
+    cls = {b: c for c in bs_class or [] for b in c}
+    s.add([And(x[b][0] == p[0], Or([x[b][ts] == p_[1] for b_, p_ in bs_ps.items() if b_ in cls.get(b, (b,))]))
+           for b, p in bs_ps.items()])
+
+    res = s.check()
+    if res != sat:
+        return res, None
+    pos = np.array([[s.model()[x[b][t]].as_long() for t in range(ts + 1)] for b in range(bs)])
+    t, b = np.nonzero(pos[:, 1:].T != pos[:, :-1].T)
+    r = np.concatenate([np.arange(k) for k in np.bincount(t, minlength=ts)]).astype(int)
+
+    return res, plan_array(np.stack([t, r, b, pos[b, t], pos[b, t + 1]], axis=1))
+
+
+def multi_robot_brick_native(rs, bs_ps, ps, bs_class=None, exact=5, time_limit=0.02, return_plan=False):
+    """
+    scalable solver for multiple robots: the targets of brick_chains, list scheduling of their chains of moves,
+    see list_schedule, then for small instances the exact model with one step less at a time down to the lower
+    bound, until it is unsatisfiable or the time limit is reached, which keeps the best plan so far
+    :param rs: number of robots
+    :param bs_ps: initial and target config of bricks-positions in a dict as {b1:(p1,p1_),b2:(p2,p2_),...}
+    :param ps: number of positions
+    :param bs_class: classes of bricks, None for unique bricks
+    :param exact: largest number of bricks for the exact model
+    :param time_limit: time limit of the exact model in min, shared by all its checks, None for no limit
+    :param return_plan: True to return the moves as well
+    :return min_ts: number of times/steps, the minimum if the exact model finished within the time limit
+            et: execution time
+            plan: np.ndarray of (step, robot, brick, from, to) rows, only if return_plan
+    """
+
+    start_time = time.time()
+    bs = len(bs_ps)
+    chains = brick_chains(bs_ps, ps, bs_class)
+    org = np.array([bs_ps[b][0] for b in range(bs)], dtype=int)
+    tag = org.copy()
+    for b, p, p_ in [move for chain in chains for move in chain if move[2] >= 0]:
+        tag[b] = p_
+
+    # best of the schedules with and without splitting
+    plan = min([list_schedule(rs, org, tag, ps, split) for split in (True, False)],
+               key=lambda plan: (plan[-1, 0] if len(plan) else -1, len(plan)))
+    min_ts = plan[-1, 0] + 1 if len(plan) else 0
+
+    # lower bound: the fewest moves shared by the robots, and a cycle needs two steps
+    lb = max(-(-sum(len(chain) for chain in chains) // rs), 2 if any(c[0][2] < 0 for c in chains) else 1) if chains else 0
+    if bs <= exact:
+        deadline = time.time() + 60 * time_limit if time_limit is not None else float('inf')
+        for ts in range(min_ts - 1, lb - 1, -1):
+            left = deadline - time.time()
+            if left <= 0:
+                break
+            res, plan_ = multi_robot_exact(rs, bs_ps, ps, bs_class, ts, None if time_limit is None else left / 60)
+            if res == unsat:  # the plan is optimal
+                break
+            if res == unknown:  # time limit reached, keep the plan
+                break
+            plan, min_ts = plan_, ts
+
+    if return_plan:
+        return int(min_ts), time.time() - start_time, plan
+    return int(min_ts), time.time() - start_time
+
+
 def main():
     rs = 3
     bs = 3
     ps = 4
     bs_ps, _ = test_case(bs, ps)
-    multi_robot_brick(rs, bs_ps, ps, bs_class=None)
+    min_ts, et, plan = cached_function(multi_robot_brick_native)(rs, bs_ps, ps, bs_class=None, return_plan=True)
+    print(f'{rs} robots, {bs} unique bricks and {ps} positions, solvable within {min_ts} steps, '
+          f'plan valid: {replay_brick(plan, bs_ps, ps)[0]}, '
+          f'list scheduling: {multi_robot_brick_native(rs, bs_ps, ps, exact=0)[0]} steps')
+
+    # native scheduler for dozens of robots and hundreds of bricks
+    print('******************** Native scheduler ********************')
+    for rs, bs in ((10, 100), (30, 300), (50, 1000)):
+        ps = bs + bs // 10
+        for cls_num in (0, 10):
+            bs_ps, bs_class = test_case(bs, ps, bs_class_num=cls_num)
+            min_ts, et, plan = multi_robot_brick_native(rs, bs_ps, ps, bs_class, return_plan=True)
+            print(f'{rs} robots, {bs} bricks in {cls_num or bs} classes and {ps} positions, '
+                  f'solvable within {min_ts} steps, '
+                  f'execution time: {int(et / 60)}min {int(et % 60)}sec {int(1e3 * et % 1e3)}ms, '
+                  f'plan valid: {replay_brick(plan, bs_ps, ps, bs_class)[0]}')
 
 
 if __name__ == '__main__':